@@ -1,22 +1,56 @@
 # app/__init__.py
 
+import multiprocessing
+import os
+
 from flask import Flask
 from flask_cors import CORS
 from .config import Config
-from .routes import register_blueprints
+from .routes import register_blueprints, register_models, audio_service
+from .services.model_registry import model_registry
+from .services.worker_pool import worker_pool
+from .services.job_service import job_manager
+from .services.speech_stream import speech_stream_server
 from .utils import create_upload_dir
 from .utils import Logger
+from .utils import InMemoryUploadRequest
 
 app_logger = Logger(name="APP", enable_file=True)
 
 
-def create_app():
+def _is_serving_process(app):
+    """调试模式下 werkzeug 重载器的监视进程同样会创建应用，但只负责重启子进程、不处理请求"""
+    return not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+
+def create_app(inference_worker=False):
+    """
+    创建应用实例
+    :param inference_worker: 是否作为推理工作进程创建（不再启动进程池，模型由工作进程自行加载）
+    """
     app = Flask(__name__)
+    app.request_class = InMemoryUploadRequest
     app.config.from_object(Config)
     CORS(app)
     app.logger_custom = app_logger
     create_upload_dir(app)
     register_blueprints(app)
+    job_manager.init_app(app)
+    register_models(model_registry)
+
+    # spawn 方式启动的子进程会重新导入 run.py，同样不能再启动进程池
+    if inference_worker or multiprocessing.parent_process() is not None:
+        model_registry.init_app(app, preload=False)
+    else:
+        serving = _is_serving_process(app)
+        if serving:
+            worker_pool.init_app(app)
+        # 启用进程池时模型在各工作进程中加载，Web 进程无需预加载
+        # 重载器监视进程不预加载模型
+        model_registry.init_app(app, preload=serving and not worker_pool.running)
+        # 实时识别需要常驻连接，在处理请求的 Web 进程中运行，避免重载器监视进程抢占端口
+        if serving:
+            speech_stream_server.init_app(app, audio_service)
     app_logger.info("应用初始化完成")
 
     return app
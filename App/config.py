@@ -12,4 +12,131 @@ class Config:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'txt', 'csv', 'mp4',
                           'wav', 'mp3', 'docx', 'doc', 'pdf'}
 
+    # 图像管道批处理大小：一次 predict 送入的图片数量
+    IMAGE_BATCH_SIZE = 8
+    # 请求可通过 batchSize 指定批处理大小，上限为 IMAGE_MAX_BATCH_SIZE
+    IMAGE_MAX_BATCH_SIZE = 32
+
+    # 各管道输入图片最长边上限（像素），超出时等比缩小后再检测，None 表示不缩放
+    # 文档矫正输出即为图像本身，默认保持原分辨率
+    IMAGE_MAX_SIDE = {
+        'ocr': 2048,
+        'table': 2560,
+        'seal': 2048,
+        'doc': None,
+    }
+
+    # PDF 输入：逐页光栅化的分辨率与并行渲染进程数
+    PDF_RENDER_DPI = 200
+    PDF_RENDER_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+    # 图像管道结果缓存：内存 LRU 层 + OUTPUT_FOLDER/cache 磁盘层
+    RESULT_CACHE_ENABLED = True
+    RESULT_CACHE_MEMORY_MB = 64
+    RESULT_CACHE_DISK_MB = 1024
+
+    # 启动时预加载并预热的模型（ocr/table/seal/doc/speech），可用环境变量覆盖，逗号分隔
+    PRELOAD_MODELS = [name.strip() for name in os.environ.get('PRELOAD_MODELS', 'ocr').split(',')]
+    MODEL_WARMUP = True
+
+    # 推理进程池：0 表示在请求线程内直接推理
+    INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 0))
+    INFERENCE_QUEUE_SIZE = 16  # 排队任务上限，超出后返回 503
+    INFERENCE_TASK_TIMEOUT = 600  # 单个任务最长等待秒数
+    INFERENCE_CPU_THREADS = None  # 每个进程的算子线程数，默认按核心数平分
+
+    # 异步任务：后台线程数、未结束任务上限（超出返回 429）、已结束任务保留秒数
+    JOB_MAX_WORKERS = 2
+    JOB_MAX_PENDING = 32
+    JOB_TTL_SECONDS = 3600
+
+    # 不超过该大小的上传请求直接在内存中解析（一键上传识别接口）
+    IN_MEMORY_UPLOAD_MAX_BYTES = 32 * 1024 * 1024
+
+    # 大模型客户端：默认接口地址、连接池上限、超时（秒）与空闲客户端回收
+    LLM_BASE_URL = os.environ.get('LLM_BASE_URL', 'https://api.deepseek.com')
+    LLM_MAX_CONNECTIONS = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS = 10
+    LLM_KEEPALIVE_EXPIRY = 60
+    LLM_CONNECT_TIMEOUT = 10
+    LLM_READ_TIMEOUT = 120
+    LLM_CLIENT_IDLE_SECONDS = 600
+    LLM_MAX_CLIENTS = 32
+
+    # 大模型调用：单次请求超时与单个文件总超时（秒）、429/5xx 重试次数与退避基数（秒）、多文件提取并发数
+    LLM_REQUEST_TIMEOUT = 120
+    LLM_FILE_TIMEOUT = 300
+    LLM_MAX_RETRIES = 3
+    LLM_RETRY_BACKOFF = 1.0
+    LLM_EXTRACT_CONCURRENCY = 4
+
+    # 超长合同分段处理：按条款切分为不超过 LLM_CHUNK_CHARS 字的分段并发分析，再汇总为一份报告
+    LLM_CHUNKED = True
+    LLM_CHUNK_CHARS = 8000
+    LLM_CHUNK_CONCURRENCY = 4
+
+    # 合同比对本地预筛选：去掉两版相同的段落，只保留变化段落及前后 LLM_DIFF_CONTEXT 段上下文
+    LLM_DIFF_PREFILTER = True
+    LLM_DIFF_CONTEXT = 2
+
+    # 大模型响应缓存：内存 LRU 条目数 + OUTPUT_FOLDER/cache/llm_cache.sqlite3 持久层
+    LLM_CACHE_ENABLED = True
+    LLM_CACHE_MEMORY_ENTRIES = 256
+    LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+    LLM_CACHE_DISK_MB = 256
+
+    # 文档文本提取：页数不少于 TEXT_PARALLEL_MIN_PAGES 的 PDF 使用多进程并行提取；解析结果内存缓存上限
+    TEXT_EXTRACT_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+    TEXT_PARALLEL_MIN_PAGES = 64
+    TEXT_CACHE_MEMORY_MB = 64
+
+    # 扫描版 PDF：去除空白后少于 TEXT_OCR_MIN_CHARS 字的页面视为没有文字层，只对这些页面做 OCR
+    TEXT_OCR_FALLBACK = True
+    TEXT_OCR_MIN_CHARS = 20
+
+    # 语音识别模型档位：MODEL_FOLDER 下的 Vosk 模型目录，请求可通过 tier 选择，未指定时使用默认档位
+    # 模型按需加载，已加载模型的内存增量之和超过 AUDIO_MODEL_MEMORY_MB 时按最近最少使用卸载（None 表示不限）
+    AUDIO_MODEL_TIERS = {
+        'fast': 'vosk-model-small-cn-0.22',
+        'accurate': 'vosk-model-cn-0.22',
+    }
+    AUDIO_DEFAULT_TIER = 'accurate'
+    AUDIO_MODEL_MEMORY_MB = 6144
+
+    # 语音识别：ffmpeg 流式解码为 16kHz 单声道 PCM，每次送入识别器的字节数（8000 字节约 0.25 秒）
+    FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    AUDIO_CHUNK_BYTES = 8000
+    # 多个音频文件并行识别的线程数，共用同一个模型（1 表示逐个识别）
+    AUDIO_RECOGNIZE_CONCURRENCY = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+    # 长录音静音切分：逐帧计算能量（dBFS），低于阈值的帧视为静音，在不短于 AUDIO_VAD_MIN_SILENCE_MS 的静音中点切开，
+    # 各片段按 AUDIO_RECOGNIZE_CONCURRENCY 并行识别；超过 AUDIO_VAD_MAX_SEGMENT_SECONDS 仍无长静音时强制切开
+    AUDIO_VAD_SEGMENTATION = True
+    AUDIO_VAD_FRAME_MS = 30
+    AUDIO_VAD_THRESHOLD_DB = -40
+    AUDIO_VAD_MIN_SILENCE_MS = 500
+    AUDIO_VAD_MAX_SEGMENT_SECONDS = 30
+
+    # 实时语音识别（WebSocket，独立端口）：每个连接一个识别器、共用模型；
+    # 同时进行的会话上限（超出以 1013 关闭）、每个连接缓存的待识别分片数、单条消息字节上限
+    AUDIO_STREAM_ENABLED = True
+    AUDIO_STREAM_HOST = '0.0.0.0'
+    AUDIO_STREAM_PORT = int(os.environ.get('AUDIO_STREAM_PORT', 5601))
+    AUDIO_STREAM_MAX_SESSIONS = 8
+    AUDIO_STREAM_QUEUE_CHUNKS = 32
+    AUDIO_STREAM_MAX_MESSAGE_BYTES = 1024 * 1024
+
+    # 视频关键帧：相邻采样点间隔不小于 VIDEO_SEEK_MIN_GAP_SECONDS 秒时直接定位，否则顺序跳帧；
+    # 场景检测按 VIDEO_SCENE_SAMPLE_FPS 采样，缩小到 VIDEO_SCENE_WIDTH 宽后比较色相-饱和度-亮度直方图，
+    # 距离（0-1）不低于 VIDEO_SCENE_THRESHOLD 且距上一关键帧不少于 VIDEO_SCENE_MIN_GAP_SECONDS 秒时取帧
+    VIDEO_SEEK_MIN_GAP_SECONDS = 2
+    VIDEO_SCENE_SAMPLE_FPS = 2
+    VIDEO_SCENE_WIDTH = 160
+    VIDEO_SCENE_THRESHOLD = 0.35
+    VIDEO_SCENE_MIN_GAP_SECONDS = 1.0
+    VIDEO_MAX_FRAMES = 1000
+    # 关键帧 JPEG 质量与后台写盘线程数
+    VIDEO_FRAME_JPEG_QUALITY = 90
+    VIDEO_FRAME_WRITERS = 2
+
     DEBUG = True
@@ -1,10 +1,14 @@
 # app/routes/__init__.py
 
-from .image_interface import image_bp
-from .audio_interface import audio_bp
+from functools import partial
+
+from .image_interface import image_bp, image_service
+from .audio_interface import audio_bp, audio_service
 from .text_interface import text_bp
 from .video_interface import video_bp
 from .upload_interface import upload_bp
+from .health_interface import health_bp
+from .jobs_interface import jobs_bp
 
 
 def register_blueprints(app):
@@ -13,3 +17,16 @@ def register_blueprints(app):
     app.register_blueprint(text_bp)
     app.register_blueprint(video_bp)
     app.register_blueprint(upload_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(jobs_bp)
+
+
+def register_models(registry):
+    """把各蓝图服务实例持有的模型登记到模型注册表"""
+    for kind in image_service.PIPELINES:
+        registry.register(
+            kind,
+            partial(image_service.ensure_pipeline, kind),
+            partial(image_service.warmup_pipeline, kind)
+        )
+    registry.register('speech', audio_service.load_model, audio_service.warmup)
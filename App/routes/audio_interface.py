@@ -2,6 +2,9 @@
 from flask import Blueprint, request, jsonify
 from flask import current_app
 from App.services.audio_service import AudioService
+from App.services.speech_stream import speech_stream_server
+from App.services.worker_pool import worker_pool, WorkerPoolBusy
+from App.routes.jobs_interface import submit_job
 
 audio_bp = Blueprint('audio', __name__, url_prefix='/audio')
 audio_service = AudioService()
@@ -13,9 +16,18 @@ def recognize():
     try:
         data = request.get_json()
         paths = data['paths']
-        current_app.logger_custom.debug(f"语音识别文件路径列表: {paths}")
+        tier = data.get('tier')
+        current_app.logger_custom.debug(f"语音识别文件路径列表: {paths}, 档位: {tier or '默认'}")
+        audio_service.resolve_tier(tier)
 
-        result = audio_service.recognize_speech(paths)
+        if data.get('async'):
+            return submit_job(
+                'audio.recognize',
+                paths,
+                lambda path: worker_pool.run(audio_service.recognize_speech, [path], tier)[0]
+            )
+
+        result = worker_pool.run(audio_service.recognize_speech, paths, tier)
         current_app.logger_custom.info(f"/audio/recognize 处理完成，返回 {len(result)} 条结果")
 
         return jsonify({
@@ -23,9 +35,27 @@ def recognize():
             "data": result
         }), 200
 
+    except ValueError as e:
+        current_app.logger_custom.warn(f"/audio/recognize 请求无效: {str(e)}")
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    except WorkerPoolBusy as e:
+        current_app.logger_custom.warn("/audio/recognize 推理队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 503, {"Retry-After": "5"}
     except FileNotFoundError as e:
         current_app.logger_custom.error(f"/audio/recognize 文件未找到: {str(e)}")
         return jsonify({"status": "failed", "error": str(e)}), 404
     except Exception as e:
         current_app.logger_custom.error(f"/audio/recognize 处理异常: {str(e)}", exc_info=True)
         return jsonify({"status": "failed", "error": f"处理异常: {str(e)}"}), 500
+
+
+@audio_bp.route('/stream/status', methods=['GET'])
+def stream_status():
+    """实时语音识别（WebSocket）服务的端口与会话数"""
+    return jsonify({"status": "success", "data": speech_stream_server.status()}), 200
+
+
+@audio_bp.route('/models', methods=['GET'])
+def models():
+    """各档位语音模型的加载状态（启用推理进程池时为 Web 进程内的状态）"""
+    return jsonify({"status": "success", "data": audio_service.model_status()}), 200
@@ -0,0 +1,40 @@
+# routes/health_interface.py
+from flask import Blueprint, jsonify
+from App.services.model_registry import model_registry
+from App.services.worker_pool import worker_pool
+
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('/health', methods=['GET'])
+def health():
+    """存活探针：进程可响应即返回 200"""
+    return jsonify({"status": "success"}), 200
+
+
+@health_bp.route('/ready', methods=['GET'])
+def ready():
+    """就绪探针：所选模型全部预热完成后才返回 200"""
+    if worker_pool.running:
+        # 模型由各推理工作进程加载
+        ready_ = worker_pool.is_ready()
+        return jsonify({
+            "status": "ready" if ready_ else "not_ready",
+            "workers": worker_pool.status()["workers"]
+        }), 200 if ready_ else 503
+
+    ready_ = model_registry.is_ready()
+    return jsonify({
+        "status": "ready" if ready_ else "not_ready",
+        "models": {name: model_registry.status().get(name, {}) for name in model_registry.selected}
+    }), 200 if ready_ else 503
+
+
+@health_bp.route('/models', methods=['GET'])
+def models():
+    """所有已登记模型的加载状态、耗时与内存占用"""
+    return jsonify({
+        "status": "success",
+        "data": model_registry.status(),
+        "worker_pool": worker_pool.status() if worker_pool.running else None
+    }), 200
@@ -1,9 +1,13 @@
 # routes/image.py
 import os
+import uuid
 
 from flask import Blueprint, send_from_directory
 from flask import request, jsonify, current_app
-from App.services.image_service import ImageService
+from App.services.image_service import ImageService, InMemoryImage
+from App.services.worker_pool import worker_pool, WorkerPoolBusy
+from App.routes.jobs_interface import submit_job
+from App.utils import DECODABLE_IMAGE_EXTENSIONS, is_allowed_file, save_uploaded_bytes
 
 # 创建蓝图，设置URL前缀为/image
 image_bp = Blueprint('image', __name__, url_prefix='/image')
@@ -12,6 +16,23 @@ image_service = ImageService()
 
 from flask import current_app
 
+
+def _parse_batch_size(value):
+    """
+    校验请求中的 batchSize：未提供时返回 None（使用 IMAGE_BATCH_SIZE），
+    否则须为不超过 IMAGE_MAX_BATCH_SIZE 的正整数
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+        raise ValueError(f"batchSize 必须是正整数: {value}")
+    batch_size = int(value)
+    max_batch_size = current_app.config.get('IMAGE_MAX_BATCH_SIZE', 32)
+    if not 1 <= batch_size <= max_batch_size:
+        raise ValueError(f"batchSize 取值范围为 1-{max_batch_size}: {batch_size}")
+    return batch_size
+
+
 @image_bp.route('/recognize', methods=['POST'])
 def image_recognize():
     current_app.logger_custom.info("收到 /image/recognize 请求")
@@ -19,8 +40,9 @@ def image_recognize():
         data = request.get_json()
         paths = data['paths']
         current_app.logger_custom.debug(f"识别路径列表: {paths}")
+        batch_size = _parse_batch_size(data.get('batchSize'))
 
-        result = image_service.process_ocr(paths)
+        result = worker_pool.run(image_service.process_ocr, paths, batch_size=batch_size)
         current_app.logger_custom.info(f"/image/recognize 处理完成，返回 {len(result)} 条结果")
 
         return jsonify({
@@ -28,6 +50,12 @@ def image_recognize():
             "data": result
         }), 200
 
+    except ValueError as e:
+        current_app.logger_custom.warn(f"/image/recognize 请求无效: {str(e)}")
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    except WorkerPoolBusy as e:
+        current_app.logger_custom.warn("/image/recognize 推理队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 503, {"Retry-After": "5"}
     except FileNotFoundError as e:
         current_app.logger_custom.error(f"/image/recognize 文件未找到: {str(e)}")
         return jsonify({"status": "failed", "error": str(e)}), 404
@@ -43,8 +71,16 @@ def table_recognize():
         data = request.get_json()
         paths = data['paths']
         current_app.logger_custom.debug(f"表格识别路径列表: {paths}")
+        batch_size = _parse_batch_size(data.get('batchSize'))
+
+        if data.get('async'):
+            return submit_job(
+                'image.table',
+                paths,
+                lambda path: worker_pool.run(image_service.process_table_recognise, [path])[0]
+            )
 
-        result = image_service.process_table_recognise(paths)
+        result = worker_pool.run(image_service.process_table_recognise, paths, batch_size=batch_size)
         current_app.logger_custom.info(f"/image/table 处理完成，返回 {len(result)} 条结果")
 
         return jsonify({
@@ -52,6 +88,12 @@ def table_recognize():
             "data": result
         }), 200
 
+    except ValueError as e:
+        current_app.logger_custom.warn(f"/image/table 请求无效: {str(e)}")
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    except WorkerPoolBusy as e:
+        current_app.logger_custom.warn("/image/table 推理队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 503, {"Retry-After": "5"}
     except FileNotFoundError as e:
         current_app.logger_custom.error(f"/image/table 文件未找到: {str(e)}")
         return jsonify({"status": "failed", "error": str(e)}), 404
@@ -67,8 +109,9 @@ def seal_recognize():
         data = request.get_json()
         paths = data['paths']
         current_app.logger_custom.debug(f"印章识别路径列表: {paths}")
+        batch_size = _parse_batch_size(data.get('batchSize'))
 
-        result = image_service.process_seal_recognise(paths)
+        result = worker_pool.run(image_service.process_seal_recognise, paths, batch_size=batch_size)
         current_app.logger_custom.info(f"/image/seal 处理完成，返回 {len(result)} 条结果")
 
         return jsonify({
@@ -76,6 +119,12 @@ def seal_recognize():
             "data": result
         }), 200
 
+    except ValueError as e:
+        current_app.logger_custom.warn(f"/image/seal 请求无效: {str(e)}")
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    except WorkerPoolBusy as e:
+        current_app.logger_custom.warn("/image/seal 推理队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 503, {"Retry-After": "5"}
     except FileNotFoundError as e:
         current_app.logger_custom.error(f"/image/seal 文件未找到: {str(e)}")
         return jsonify({"status": "failed", "error": str(e)}), 404
@@ -91,8 +140,9 @@ def document_correct():
         data = request.get_json()
         paths = data['paths']
         current_app.logger_custom.debug(f"文档校正路径列表: {paths}")
+        batch_size = _parse_batch_size(data.get('batchSize'))
 
-        result = image_service.process_doc(paths)
+        result = worker_pool.run(image_service.process_doc, paths, batch_size=batch_size)
         current_app.logger_custom.info(f"/image/correct 处理完成，返回 {len(result)} 条结果")
 
         return jsonify({
@@ -100,6 +150,12 @@ def document_correct():
             "data": result
         }), 200
 
+    except ValueError as e:
+        current_app.logger_custom.warn(f"/image/correct 请求无效: {str(e)}")
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    except WorkerPoolBusy as e:
+        current_app.logger_custom.warn("/image/correct 推理队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 503, {"Retry-After": "5"}
     except FileNotFoundError as e:
         current_app.logger_custom.error(f"/image/correct 文件未找到: {str(e)}")
         return jsonify({"status": "failed", "error": str(e)}), 404
@@ -108,6 +164,87 @@ def document_correct():
         return jsonify({"status": "failed", "error": f"处理异常: {str(e)}"}), 500
 
 
+def _read_uploaded_images():
+    """
+    读取 multipart 中的 files 字段并直接在内存中解码；
+    表单字段 persist=true 时同时把原始文件保存到 UPLOAD_FOLDER
+    """
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        raise ValueError("未选择文件")
+
+    persist = request.form.get('persist', 'false').lower() in ('1', 'true', 'yes')
+    session_id = uuid.uuid4().hex
+    images = []
+    for file in files:
+        if not is_allowed_file(file.filename, DECODABLE_IMAGE_EXTENSIONS):
+            raise ValueError(f"文件类型不支持: {file.filename}")
+        data = file.read()
+        path = save_uploaded_bytes(file.filename, data, session_id) if persist else None
+        images.append(InMemoryImage(file.filename, data, path=path))
+    return images
+
+
+def _upload_and_process(endpoint, method):
+    """一键上传识别：接收文件、内存解码并调用对应的识别流程"""
+    current_app.logger_custom.info(f"收到 {endpoint} 请求")
+    try:
+        images = _read_uploaded_images()
+        batch_size = _parse_batch_size(request.form.get('batchSize'))
+        current_app.logger_custom.debug(f"{endpoint} 上传文件: {[image.filename for image in images]}")
+
+        result = worker_pool.run(method, images, batch_size=batch_size)
+        for image, item in zip(images, result):
+            item["filename"] = image.filename
+            if image.path:
+                item["path"] = image.path
+        current_app.logger_custom.info(f"{endpoint} 处理完成，返回 {len(result)} 条结果")
+
+        return jsonify({
+            "status": "success",
+            "data": result
+        }), 200
+
+    except ValueError as e:
+        current_app.logger_custom.warn(f"{endpoint} 请求无效: {str(e)}")
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    except WorkerPoolBusy as e:
+        current_app.logger_custom.warn(f"{endpoint} 推理队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 503, {"Retry-After": "5"}
+    except Exception as e:
+        current_app.logger_custom.error(f"{endpoint} 处理异常: {str(e)}")
+        return jsonify({"status": "failed", "error": f"处理异常: {str(e)}"}), 500
+
+
+@image_bp.route('/recognize/upload', methods=['POST'])
+def image_recognize_upload():
+    return _upload_and_process('/image/recognize/upload', image_service.process_ocr)
+
+
+@image_bp.route('/table/upload', methods=['POST'])
+def table_recognize_upload():
+    return _upload_and_process('/image/table/upload', image_service.process_table_recognise)
+
+
+@image_bp.route('/seal/upload', methods=['POST'])
+def seal_recognize_upload():
+    return _upload_and_process('/image/seal/upload', image_service.process_seal_recognise)
+
+
+@image_bp.route('/correct/upload', methods=['POST'])
+def document_correct_upload():
+    return _upload_and_process('/image/correct/upload', image_service.process_doc)
+
+
+@image_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """图像结果缓存命中统计"""
+    return jsonify({
+        "status": "success",
+        "data": image_service.result_cache.stats()
+    }), 200
+
+
 def configure_output_routes(bp):
     """统一配置所有文件返回路由"""
 
@@ -122,6 +259,7 @@ def configure_output_routes(bp):
             'ocr',
             session_id
         )
+        image_service.render_overlay('ocr', base_dir, filename)
         return send_from_directory(base_dir, filename)
 
     # 表格识别结果图片（支持 file_0/images/xxx.png）
@@ -132,6 +270,7 @@ def configure_output_routes(bp):
             'table',
             session_id
         )
+        image_service.render_overlay('table', base_dir, filename)
         return send_from_directory(base_dir, filename)
 
     # 表格数据下载（支持 file_0/data/xxx.xlsx）
@@ -156,6 +295,7 @@ def configure_output_routes(bp):
             'seal',
             session_id,
         )
+        image_service.render_overlay('seal', data_dir, filename)
         return send_from_directory(data_dir, filename)
 
     @bp.route('/correct_outputs/<session_id>/<path:filename>')
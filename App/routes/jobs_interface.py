@@ -0,0 +1,57 @@
+# routes/jobs_interface.py
+from flask import Blueprint, request, jsonify, current_app, url_for
+from App.services.job_service import job_manager, JobQueueFull
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def submit_job(task, paths, run_file):
+    """
+    供各业务接口在 async=true 时调用：提交任务并立即返回 202 与任务 ID
+    :param run_file: 回调 (文件路径) -> 单个文件的结果
+    """
+    try:
+        job = job_manager.submit(task, paths, run_file, base_url=request.host_url)
+    except JobQueueFull as e:
+        current_app.logger_custom.warn(f"{task} 任务队列已满")
+        return jsonify({"status": "failed", "error": str(e)}), 429, {"Retry-After": "10"}
+
+    current_app.logger_custom.info(f"{task} 已提交异步任务 {job['job_id']}，文件数 {len(paths)}")
+    status_url = url_for('jobs.get_job', job_id=job['job_id'], _external=True)
+    return jsonify({
+        "status": "accepted",
+        "job_id": job['job_id'],
+        "status_url": status_url,
+        "data": job
+    }), 202, {"Location": status_url}
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """查询任务进度，已完成文件的结果随进度一并返回"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"status": "failed", "error": "任务不存在或已过期"}), 404
+
+    include_results = request.args.get('results', '1') != '0'
+    return jsonify({
+        "status": "success",
+        "data": job_manager.describe(job, include_results=include_results)
+    }), 200
+
+
+@jobs_bp.route('/<job_id>/files/<int:index>', methods=['GET'])
+def get_job_file(job_id, index):
+    """单独获取某个文件的结果；尚未完成时返回 202"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"status": "failed", "error": "任务不存在或已过期"}), 404
+    if not 0 <= index < len(job['files']):
+        return jsonify({"status": "failed", "error": "文件序号越界"}), 404
+
+    entry = job['files'][index]
+    if entry['status'] == 'done':
+        return jsonify({"status": "success", "data": entry['result']}), 200
+    if entry['status'] == 'failed':
+        return jsonify({"status": "failed", "error": entry['error']}), 500
+    return jsonify({"status": entry['status']}), 202
@@ -1,8 +1,58 @@
-from flask import Blueprint, request, jsonify, current_app
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from App.services.text_service import TextService
+from App.services.worker_pool import worker_pool
+from App.routes.image_interface import image_service
+from App.routes.jobs_interface import submit_job
+
+
+def _ocr_pdf_pages(path, page_numbers):
+    """
+    扫描页 OCR：启用推理进程池时把页面分给各工作进程并行识别（工作进程自行渲染页面），
+    否则在当前进程中按批识别
+    """
+    if not worker_pool.running or worker_pool.num_workers <= 1 or len(page_numbers) <= 1:
+        return worker_pool.run(image_service.ocr_pdf_pages, path, page_numbers)
+
+    groups = [page_numbers[i::worker_pool.num_workers] for i in range(worker_pool.num_workers)]
+    groups = [group for group in groups if group]
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        results = list(executor.map(lambda group: worker_pool.run(image_service.ocr_pdf_pages, path, group), groups))
+
+    texts = dict(zip((page for group in groups for page in group), (text for result in results for text in result)))
+    return [texts[page] for page in page_numbers]
+
 
 text_bp = Blueprint('text', __name__, url_prefix='/text')
-text_service = TextService()
+text_service = TextService(ocr=_ocr_pdf_pages)
+
+
+def _stream_response(data, events):
+    """
+    把服务层产出的事件流转为流式响应
+    - 默认 SSE（text/event-stream），事件名即 event 字段
+    - stream 为 "ndjson" 或 Accept 为 application/x-ndjson 时，每行一个 JSON
+    """
+    ndjson = data.get('stream') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+
+    def generate():
+        for event in events:
+            payload = json.dumps(event, ensure_ascii=False)
+            if ndjson:
+                yield payload + "\n"
+            else:
+                yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # 关闭反向代理缓冲，分片到达即转发
+        }
+    )
 
 
 @text_bp.route('/compare', methods=['POST'])
@@ -13,9 +63,20 @@ def texts_compare():
         paths = data['paths']
         api_key = data.get('apiKey')
         base_url = data.get('baseUrl')
-        text_service.ensure_key(api_key, base_url)  # 设置首次使用的 key
+        chunked = data.get('chunked')  # 超长文本分段处理，缺省时使用 LLM_CHUNKED
+        use_prefilter = data.get('prefilter')  # 只比对变化的段落，缺省时使用 LLM_DIFF_PREFILTER
 
-        results = text_service.compare_documents(paths)
+        if data.get('stream'):
+            return _stream_response(
+                data,
+                text_service.stream_compare_documents(
+                    paths, api_key=api_key, base_url=base_url, chunked=chunked, use_prefilter=use_prefilter
+                )
+            )
+
+        results = text_service.compare_documents(
+            paths, api_key=api_key, base_url=base_url, chunked=chunked, use_prefilter=use_prefilter
+        )
         return jsonify({"status": "success", "data": results}), 200
     except Exception as e:
         current_app.logger_custom.error(f"/text/compare 处理失败: {str(e)}", exc_info=True)
@@ -30,10 +91,31 @@ def texts_extract():
         paths = data['paths']
         api_key = data.get('apiKey')
         base_url = data.get('baseUrl')
-        text_service.ensure_key(api_key, base_url)  # 🔐 设置首次使用的 key
+        chunked = data.get('chunked')  # 超长文本分段处理，缺省时使用 LLM_CHUNKED
+
+        if data.get('async'):
+            return submit_job(
+                'text.extract',
+                paths,
+                lambda path: text_service.extract_contract_info(
+                    [path], api_key=api_key, base_url=base_url, chunked=chunked
+                )[0]
+            )
 
-        results = text_service.extract_contract_info(paths)
+        if data.get('stream'):
+            return _stream_response(
+                data,
+                text_service.stream_extract_contract_info(paths, api_key=api_key, base_url=base_url, chunked=chunked)
+            )
+
+        results = text_service.extract_contract_info(paths, api_key=api_key, base_url=base_url, chunked=chunked)
         return jsonify({"status": "success", "data": results}), 200
     except Exception as e:
         current_app.logger_custom.error(f"/text/extract 处理失败: {str(e)}", exc_info=True)
         return jsonify({"status": "failed", "error": f"处理异常: {str(e)}"}), 500
+
+
+@text_bp.route('/metrics', methods=['GET'])
+def text_metrics():
+    """大模型响应缓存命中率与客户端池状态"""
+    return jsonify({"status": "success", "data": text_service.metrics()}), 200
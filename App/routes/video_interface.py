@@ -1,5 +1,7 @@
 # routes/video.py
-from flask import Blueprint, request, jsonify
+import os
+
+from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from App.services.video_service import VideoService
 
 video_bp = Blueprint('video', __name__, url_prefix='/video')
@@ -32,7 +34,13 @@ def extract_frames():
         data = request.get_json()
         file_id = data['file_id']
         interval = data.get('interval', 5)  # 默认每5秒提取一帧
-        result = video_service.extract_key_frames(file_id, interval)
+        result = video_service.extract_key_frames(
+            file_id,
+            interval,
+            mode=data.get('mode', 'interval'),  # interval 固定间隔 / scene 场景切换
+            threshold=data.get('threshold'),
+            max_frames=data.get('max_frames')
+        )
 
         return jsonify({
             "status": "success",
@@ -40,12 +48,25 @@ def extract_frames():
             "frames": result
         }), 200
 
+    except ValueError as e:
+        return jsonify({"status": "failed", "error": str(e)}), 400
     except FileNotFoundError as e:
         return jsonify({"status": "failed", "error": str(e)}), 404
     except Exception as e:
         return jsonify({"status": "failed", "error": f"关键帧提取失败: {str(e)}"}), 500
 
 
+@video_bp.route('/frame_outputs/<session_id>/<path:filename>')
+def get_frame_output(session_id, filename):
+    """获取关键帧图片"""
+    base_dir = os.path.join(
+        current_app.config['OUTPUT_FOLDER'],
+        'frames',
+        session_id
+    )
+    return send_from_directory(base_dir, filename)
+
+
 @video_bp.route('/generate_thumbnail', methods=['POST'])
 def generate_thumbnail():
     """生成视频缩略图接口"""
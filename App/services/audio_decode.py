@@ -0,0 +1,101 @@
+# services/audio_decode.py (音频流式解码)
+import os
+import subprocess
+import threading
+
+SAMPLE_WIDTH = 2  # 16 位 PCM
+# 解码失败时错误信息只保留 ffmpeg 错误输出的末尾部分
+STDERR_TAIL_BYTES = 4096
+
+
+def ffmpeg_pcm_command(ffmpeg, source, sample_rate):
+    """
+    把音频转为单声道 16 位 PCM 并写到标准输出的 ffmpeg 命令
+    :param source: 文件路径，或 'pipe:0' 表示从标准输入读取
+    """
+    stdin_flags = [] if source == 'pipe:0' else ['-nostdin']
+    return [
+        ffmpeg, *stdin_flags, '-hide_banner', '-loglevel', 'error',
+        '-i', os.fspath(source),
+        '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-f', 's16le', '-acodec', 'pcm_s16le', 'pipe:1',
+    ]
+
+
+def _read_full(stream, view):
+    """把管道数据读满 view，返回实际读入的字节数（到达文件末尾时小于 len(view)）"""
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def _drain_stderr(stream, tail):
+    """持续读取 ffmpeg 的错误输出，只保留末尾部分；不读取时管道写满会使 ffmpeg 阻塞"""
+    for chunk in iter(lambda: stream.read(4096), b''):
+        tail += chunk
+        del tail[:-STDERR_TAIL_BYTES]
+    stream.close()
+
+
+def iter_pcm_blocks(path, sample_rate=16000, block_bytes=8000, ffmpeg='ffmpeg'):
+    """
+    通过 ffmpeg 管道把音频解码为单声道 16 位 PCM，按固定大小的块产出
+    - 整个解码过程只使用一块复用的缓冲区，内存占用与音频时长无关
+    - 满块直接产出该缓冲区本身（不复制），调用方必须在下一次迭代前用完；
+      最后一个不满的块以 bytes 形式产出
+    :param block_bytes: 每块字节数，按采样宽度向下取整
+    :raises FileNotFoundError: 音频文件不存在
+    :raises RuntimeError: ffmpeg 不可用或解码失败
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"音频文件不存在: {path}")
+
+    block_bytes = max(SAMPLE_WIDTH, block_bytes - block_bytes % SAMPLE_WIDTH)
+    try:
+        process = subprocess.Popen(
+            ffmpeg_pcm_command(ffmpeg, path, sample_rate),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"未找到 ffmpeg: {ffmpeg}")
+
+    stderr = bytearray()
+    stderr_reader = threading.Thread(
+        target=_drain_stderr,
+        args=(process.stderr, stderr),
+        name='ffmpeg-stderr',
+        daemon=True
+    )
+    stderr_reader.start()
+
+    buffer = bytearray(block_bytes)
+    view = memoryview(buffer)
+    completed = False
+    try:
+        while True:
+            count = _read_full(process.stdout, view)
+            if count == block_bytes:
+                yield buffer
+                continue
+            if count:
+                yield bytes(view[:count])
+            break
+        completed = True
+    finally:
+        view.release()
+        process.stdout.close()
+        if not completed:
+            # 调用方提前结束迭代：终止解码进程
+            process.kill()
+        returncode = process.wait()
+        stderr_reader.join()
+
+    if returncode != 0:
+        message = stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"音频解码失败 {path}: {message or f'ffmpeg 退出码 {returncode}'}")
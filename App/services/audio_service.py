@@ -1,63 +1,240 @@
 import os
+import threading
 import uuid
 import json
-from pydub import AudioSegment
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from vosk import Model, KaldiRecognizer
 from flask import current_app
 import io
 
+from App.services.audio_decode import iter_pcm_blocks
+from App.services.audio_vad import SilenceSegmenter
+from App.utils import get_memory_usage_mb
+
 
 class AudioService:
     def __init__(self):
         """初始化语音服务类"""
-        self.speech_model = None
+        # 已加载的各档位模型，按最近使用排序：档位 -> {model, memory_mb, load_seconds}
+        self.speech_models = OrderedDict()
         self.sample_rate = 16000
+        # 保证并发的首次请求只加载一次模型
+        self._model_lock = threading.Lock()
+
+    @staticmethod
+    def resolve_tier(tier=None):
+        """校验档位名称，未指定时使用默认档位"""
+        tiers = current_app.config.get('AUDIO_MODEL_TIERS', {'accurate': 'vosk-model-cn-0.22'})
+        tier = tier or current_app.config.get('AUDIO_DEFAULT_TIER', 'accurate')
+        if tier not in tiers:
+            raise ValueError(f"不支持的识别档位: {tier}，可选: {', '.join(tiers)}")
+        return tier
 
-    def _initialize_speech_model(self):
-        """初始化语音识别模型"""
+    def _initialize_speech_model(self, tier):
+        """初始化指定档位的语音识别模型，记录加载耗时与内存增量"""
+        memory_before = get_memory_usage_mb()
+        start = time.perf_counter()
         try:
             model_path = os.path.join(
                 current_app.config.get('MODEL_FOLDER', 'models'),
-                'vosk-model-cn-0.22'
+                current_app.config['AUDIO_MODEL_TIERS'][tier]
             )
-            self.speech_model = Model(model_path)
+            model = Model(model_path)
         except Exception as e:
             raise RuntimeError(f"语音模型加载失败: {str(e)}")
 
-    def recognize_speech(self, paths):
+        memory_after = get_memory_usage_mb()
+        memory_mb = None
+        if memory_before is not None and memory_after is not None:
+            memory_mb = round(max(0.0, memory_after - memory_before), 1)
+        self.speech_models[tier] = {
+            "model": model,
+            "memory_mb": memory_mb,
+            "load_seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def _evict_models(self, keep):
+        """已加载模型的内存超过 AUDIO_MODEL_MEMORY_MB 时，按最近最少使用卸载（至少保留 keep）"""
+        budget = current_app.config.get('AUDIO_MODEL_MEMORY_MB')
+        if not budget:
+            return
+        while len(self.speech_models) > 1:
+            used = sum(entry["memory_mb"] or 0 for entry in self.speech_models.values())
+            if used <= budget:
+                return
+            tier = next(iter(self.speech_models))
+            if tier == keep:
+                self.speech_models.move_to_end(tier)
+                continue
+            # 正在使用该模型的识别器仍持有引用（Vosk 模型按引用计数释放），识别结束后才真正释放内存
+            del self.speech_models[tier]
+            current_app.logger_custom.info(f"语音模型 {tier} 已卸载，已用 {used} MB 超出预算 {budget} MB")
+
+    def load_model(self, tier=None):
         """
-        识别多个音频文件中的语音
-        :param paths: 音频文件路径列表
-        :return: 列表，每个元素是 {'text': '对应识别文本'}
+        加载指定档位的语音模型（已加载时直接返回）
+        :param tier: 档位名称（如 fast / accurate），None 表示默认档位
         """
-        if not self.speech_model:
-            self._initialize_speech_model()
+        tier = self.resolve_tier(tier)
+        with self._model_lock:
+            if tier not in self.speech_models:
+                self._initialize_speech_model(tier)
+                self._evict_models(keep=tier)
+            self.speech_models.move_to_end(tier)
+            return self.speech_models[tier]["model"]
 
-        results = []
+    def model_status(self):
+        """各档位模型的加载状态、耗时与内存占用"""
+        tiers = current_app.config.get('AUDIO_MODEL_TIERS', {})
+        with self._model_lock:
+            return {
+                tier: {
+                    "model": name,
+                    "loaded": tier in self.speech_models,
+                    **{
+                        key: value for key, value in self.speech_models.get(tier, {}).items() if key != "model"
+                    },
+                }
+                for tier, name in tiers.items()
+            }
 
-        try:
-            for audio_path in paths:
-                audio = AudioSegment.from_file(audio_path)
-                audio = audio.set_channels(1).set_frame_rate(self.sample_rate)
-                raw_audio = audio.raw_data
+    def warmup(self):
+        """用半秒静音跑一次识别，提前完成解码图的初始化"""
+        recognizer = KaldiRecognizer(self.load_model(), self.sample_rate)
+        recognizer.AcceptWaveform(bytes(self.sample_rate))
+        recognizer.FinalResult()
+
+    @staticmethod
+    def _decode_options():
+        """读取解码与切分配置（需在应用上下文中调用，结果传给识别线程）"""
+        config = current_app.config
+        vad = None
+        if config.get('AUDIO_VAD_SEGMENTATION', True):
+            vad = {
+                "frame_ms": config.get('AUDIO_VAD_FRAME_MS', 30),
+                "threshold_db": config.get('AUDIO_VAD_THRESHOLD_DB', -40),
+                "min_silence_ms": config.get('AUDIO_VAD_MIN_SILENCE_MS', 500),
+                "max_segment_seconds": config.get('AUDIO_VAD_MAX_SEGMENT_SECONDS', 30),
+            }
+        return {
+            "block_bytes": config.get('AUDIO_CHUNK_BYTES', 8000),
+            "ffmpeg": config.get('FFMPEG_BINARY', 'ffmpeg'),
+            "vad": vad,
+        }
+
+    def _pcm_blocks(self, audio_path, options):
+        return iter_pcm_blocks(
+            audio_path,
+            sample_rate=self.sample_rate,
+            block_bytes=options["block_bytes"],
+            ffmpeg=options["ffmpeg"]
+        )
+
+    def _transcribe(self, model, blocks):
+        """把 PCM 块依次送入新的识别器，返回识别出的文本段列表"""
+        recognizer = KaldiRecognizer(model, self.sample_rate)
+
+        text_parts = []
+        for block in blocks:
+            if recognizer.AcceptWaveform(block):
+                result = json.loads(recognizer.Result())
+                text_parts.append(result['text'].replace(" ", ''))
+
+        final_result = json.loads(recognizer.FinalResult())
+        if final_result.get('text'):
+            text_parts.append(final_result['text'].replace(" ", ''))
+
+        return text_parts
 
-                recognizer = KaldiRecognizer(self.speech_model, self.sample_rate)
+    def _recognize_file(self, model, audio_path, options):
+        """流式解码单个音频文件并识别，内存占用与音频时长无关"""
+        return {"text": "\n".join(self._transcribe(model, self._pcm_blocks(audio_path, options)))}
 
-                text_parts = []
-                chunk_size = 4000
-                for i in range(0, len(raw_audio), chunk_size):
-                    chunk = raw_audio[i:i + chunk_size]
-                    if recognizer.AcceptWaveform(chunk):
-                        result = json.loads(recognizer.Result())
-                        text_parts.append(result['text'].replace(" ", ''))
+    def _recognize_segment(self, model, pcm, block_bytes):
+        # 通过 memoryview 切块，不复制片段数据
+        pcm = memoryview(pcm)
+        blocks = (pcm[i:i + block_bytes] for i in range(0, len(pcm), block_bytes))
+        return "\n".join(part for part in self._transcribe(model, blocks) if part)
 
-                final_result = json.loads(recognizer.FinalResult())
-                if final_result.get('text'):
-                    text_parts.append(final_result['text'].replace(" ", ''))
+    def _recognize_segmented(self, model, audio_path, options, executor, max_pending):
+        """
+        边解码边按静音切分，片段提交到线程池并行识别，再按时间顺序拼接
+        已切出但尚未识别完的片段不超过 max_pending 个，内存占用与音频时长无关
+        """
+        segmenter = SilenceSegmenter(self.sample_rate, **options["vad"])
+        pending, segments = deque(), []
+
+        def collect():
+            start, end, future = pending.popleft()
+            text = future.result()
+            if text:
+                segments.append({"start": start, "end": end, "text": text})
+
+        def submit(found):
+            for start, end, pcm in found:
+                future = executor.submit(self._recognize_segment, model, pcm, options["block_bytes"])
+                pending.append((start, end, future))
+                while len(pending) > max_pending:
+                    collect()
 
-                results.append({"text": "\n".join(text_parts)})
+        for block in self._pcm_blocks(audio_path, options):
+            submit(segmenter.feed(block))
+        submit(segmenter.flush())
+        while pending:
+            collect()
 
-            return results
+        return {
+            "text": "\n".join(segment["text"] for segment in segments),
+            "segments": segments,
+        }
+
+    @staticmethod
+    def _map(fn, items, concurrency):
+        """按输入顺序返回结果，concurrency 为 1 时在当前线程中逐个执行"""
+        if concurrency == 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='speech') as executor:
+            return list(executor.map(fn, items))
+
+    def recognize_speech(self, paths, tier=None):
+        """
+        识别多个音频文件中的语音
+        - 多个文件并行识别：共用同一个已加载的模型，每个文件各自创建识别器
+        - 启用静音切分时，长录音在静音处切为片段并行识别，结果附带各片段的起止时间（秒）
+        :param paths: 音频文件路径列表
+        :param tier: 模型档位（fast 速度优先 / accurate 准确率优先），None 表示默认档位
+        :return: 列表，每个元素是 {'text': '对应识别文本'}（切分时另含 'segments'），顺序与 paths 一致
+        """
+        model = self.load_model(tier)
+        options = self._decode_options()
+        concurrency = max(1, current_app.config.get('AUDIO_RECOGNIZE_CONCURRENCY', 1))
+        # 推理进程池中每个进程只分到部分核心
+        cpu_threads = current_app.config.get('INFERENCE_CPU_THREADS')
+        if cpu_threads:
+            concurrency = min(concurrency, cpu_threads)
+        file_concurrency = min(len(paths), concurrency) or 1
+
+        try:
+            if options["vad"] is not None:
+                # 文件线程只负责解码与切分，识别统一交给片段线程池，识别线程总数不超过 concurrency
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='speech-segment') as executor:
+                    return self._map(
+                        lambda audio_path: self._recognize_segmented(
+                            model, audio_path, options, executor, max_pending=concurrency * 2
+                        ),
+                        paths,
+                        file_concurrency
+                    )
+            # 识别器在原生代码中解码时释放 GIL，线程即可并行利用多核
+            return self._map(
+                lambda audio_path: self._recognize_file(model, audio_path, options),
+                paths,
+                file_concurrency
+            )
 
+        except FileNotFoundError:
+            raise
         except Exception as e:
             raise RuntimeError(f"语音识别失败: {str(e)}")
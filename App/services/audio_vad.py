@@ -0,0 +1,105 @@
+# services/audio_vad.py (基于能量的静音切分)
+import numpy as np
+
+SAMPLE_WIDTH = 2  # 16 位 PCM
+
+
+def frame_energy_db(samples, frame_len):
+    """逐帧均方根能量（dBFS），不足一帧的尾部样本忽略"""
+    count = len(samples) // frame_len
+    frames = samples[:count * frame_len].astype(np.float32).reshape(count, frame_len) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def silence_runs(is_silent, min_frames):
+    """连续静音帧段的 (起始帧, 结束帧) 列表，只保留不短于 min_frames 的段"""
+    padded = np.concatenate(([False], is_silent, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    keep = ends - starts >= min_frames
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+class SilenceSegmenter:
+    """
+    流式静音切分：逐块送入 PCM，在足够长的静音中点处切开，产出语音片段
+    - 只缓存当前未切出的音频，内存占用不超过一个最长片段
+    - 超过 max_segment_seconds 仍没有长静音时，在后半段能量最低的帧处强制切开
+    - 全部为静音的片段直接丢弃
+    - 切出的片段直接引用原缓冲区（memoryview，不复制），缓冲区只复制切点之后的剩余部分
+    片段为 (起始秒, 结束秒, PCM memoryview)
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, threshold_db=-40.0,
+                 min_silence_ms=500, max_segment_seconds=30.0):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_len * SAMPLE_WIDTH
+        self.frame_seconds = frame_ms / 1000
+        self.threshold_db = threshold_db
+        self.min_silence = max(1, min_silence_ms // frame_ms)
+        self.max_frames = max(self.min_silence * 2, int(max_segment_seconds * 1000) // frame_ms)
+        self._pcm = bytearray()
+        self._energy = np.empty(0, dtype=np.float32)
+        self._offset = 0  # 缓冲区起点对应的全局帧号
+
+    def _energy_of(self, first_frame, last_frame):
+        # 视图只在函数内存活，返回前释放，之后才能修改缓冲区
+        samples = np.frombuffer(
+            self._pcm,
+            dtype='<i2',
+            count=(last_frame - first_frame) * self.frame_len,
+            offset=first_frame * self.frame_bytes
+        )
+        return frame_energy_db(samples, self.frame_len)
+
+    def feed(self, block):
+        """送入一块 PCM，返回本次切出的片段列表"""
+        self._pcm += block
+        complete = len(self._pcm) // self.frame_bytes
+        if complete > len(self._energy):
+            self._energy = np.concatenate((self._energy, self._energy_of(len(self._energy), complete)))
+        return list(self._cut())
+
+    def flush(self):
+        """输入结束，返回剩余音频构成的片段列表"""
+        segment = self._emit(len(self._energy), len(self._pcm))
+        return [segment] if segment else []
+
+    def _cut(self):
+        while True:
+            is_silent = self._energy < self.threshold_db
+            cut = None
+            for start, end in silence_runs(is_silent, self.min_silence):
+                # 延续到缓冲区末尾的静音可能还没结束，等待更多数据
+                if end < len(is_silent) and (start + end) // 2 > 0:
+                    cut = (start + end) // 2
+                    break
+            if cut is None and len(self._energy) >= self.max_frames:
+                half = self.max_frames // 2
+                cut = half + int(np.argmin(self._energy[half:self.max_frames]))
+            if not cut:
+                return
+
+            segment = self._emit(cut, cut * self.frame_bytes)
+            self._energy = self._energy[cut:]
+            self._offset += cut
+            if segment:
+                yield segment
+
+    def _take(self, size):
+        """从缓冲区取出前 size 字节：原缓冲区整体交给片段，新缓冲区只保留其后的数据"""
+        pcm = self._pcm
+        self._pcm = pcm[size:]
+        return memoryview(pcm)[:size]
+
+    def _emit(self, frames, size):
+        """取出缓冲区前 frames 帧（size 字节）构成的片段，没有语音帧时丢弃并返回 None"""
+        has_speech = size and (self._energy[:frames] >= self.threshold_db).any()
+        pcm = self._take(size)
+        if not has_speech:
+            return None
+        start = self._offset * self.frame_seconds
+        end = start + size / SAMPLE_WIDTH / self.sample_rate
+        return round(start, 2), round(end, 2), pcm
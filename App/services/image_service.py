@@ -1,22 +1,166 @@
 # services/image_service.py (业务逻辑层)
+import json
 import os
+import re
+import threading
 import uuid
+from itertools import islice
 from pathlib import Path
 
 import numpy as np
+from io import BytesIO
+from PIL import Image
 from flask import url_for, current_app
+from werkzeug.security import safe_join
 from paddlex import create_pipeline
-from itertools import tee
+from paddlex.inference import PaddlePredictorOption
+from paddlex.inference.pipelines import load_pipeline_config
 import cv2
 
+from App.services.result_cache import ResultCache
+from App.services.pdf_raster import is_pdf, iter_pdf_pages, render_page
+from App.services.visualization import RENDERERS, read_image, write_image
+
+RESULT_FILENAME = 'result.json'
+SOURCE_FILENAME = 'source.json'
+# 可视化图像的文件名（相对于 file_{idx} 目录），按页编号
+OVERLAY_FILENAMES = {
+    'ocr': 'ocr_res_img_{page}.png',
+    'table': 'images/table_res_img_{page}.png',
+    'seal': 'seal_res_img_{page}.png',
+}
+DOC_FILENAME = 'result_{page}.png'
+
+
+class InMemoryImage:
+    """
+    直接从请求中读取的图片：原始字节用于缓存键与可选落盘，解码后的数组直接交给管道。
+    跨进程传递时只序列化原始字节。
+    """
+
+    def __init__(self, filename, data, path=None):
+        self.filename = filename
+        self.data = data
+        self.path = path  # 选择保存输入时的落盘路径
+        self._array = None
+        # 只解析文件头校验格式并取得尺寸，像素解码推迟到推理前（可按缩放比例降采样解码）
+        try:
+            with Image.open(BytesIO(data)) as image:
+                self.size = image.size
+        except Exception:
+            raise ValueError(f"无法解码图片: {filename}")
+
+    def to_array(self):
+        if self._array is None:
+            self._array = cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return self._array
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_array'] = None
+        return state
+
+
+# JPEG 可在解码时直接按 1/2、1/4、1/8 降采样，省去全尺寸解码的时间与内存
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+
+def _prepare_input(item, max_side):
+    """
+    推理前的缩放预处理：最长边超过 max_side 时等比缩小
+    :param item: 文件路径或 InMemoryImage
+    :param max_side: 最长边上限，None 表示不缩放
+    :return: (交给管道的输入, 缩放比例)，比例用于把坐标映射回原图
+    """
+    is_memory = isinstance(item, InMemoryImage)
+    if not max_side:
+        return (item.to_array() if is_memory else item), 1.0
+
+    if is_memory:
+        width, height = item.size
+    else:
+        with Image.open(item) as image:
+            width, height = image.size
+    longest = max(width, height)
+    if longest <= max_side:
+        return (item.to_array() if is_memory else item), 1.0
+
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+        if longest / factor >= max_side:
+            flag = reduced_flag
+            break
+
+    data = np.frombuffer(item.data, dtype=np.uint8) if is_memory else np.fromfile(item, dtype=np.uint8)
+    image = cv2.imdecode(data, flag)
+    if image is None:
+        raise ValueError(f"无法解码图片: {item.filename if is_memory else item}")
+
+    return _downscale_array(image, max_side, longest)
+
+
+def _downscale_array(image, max_side, original_longest=None):
+    """
+    把已解码的图像等比缩小到最长边不超过 max_side
+    :param original_longest: 原图最长边（降采样解码时传入），用于计算相对原图的比例
+    :return: (图像, 相对原图的缩放比例)
+    """
+    original_longest = original_longest or max(image.shape[:2])
+    if not max_side:
+        return image, max(image.shape[:2]) / original_longest
+
+    height, width = image.shape[:2]
+    if max(height, width) > max_side:
+        ratio = max_side / max(height, width)
+        image = cv2.resize(image, (round(width * ratio), round(height * ratio)), interpolation=cv2.INTER_AREA)
+
+    # EXIF 旋转不改变最长边，按最长边计算比例即可
+    return image, max(image.shape[:2]) / original_longest
+
+
+def _polys_to_list(polys, scale=1.0, offset=(0, 0)):
+    """把 numpy 坐标转为可 JSON 序列化的列表，平移 offset 后按缩放比例还原到原图坐标"""
+    if any(offset):
+        polys = [np.asarray(poly).reshape(-1, 2) + offset for poly in polys]
+    if scale == 1.0:
+        return [np.asarray(poly).tolist() for poly in polys]
+    return [np.round(np.asarray(poly, dtype=np.float32) / scale, 1).tolist() for poly in polys]
+
 
 class ImageService:
+    # 管道类型 -> (实例属性, 初始化方法, PaddleX 管道名称, 推理参数)
+    PIPELINES = {
+        'ocr': ('ocr_pipeline', '_initialize_ocr_model', 'OCR', dict(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+            use_textline_orientation=False
+        )),
+        'table': ('table_pipeline', '_initialize_table_model', 'table_recognition', dict(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+        )),
+        'seal': ('seal_pipeline', '_initialize_seal_model', 'seal_recognition', dict(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+        )),
+        'doc': ('doc_pipeline', '_initialize_doc_preprocessor_model', 'doc_preprocessor', dict(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=True,
+        )),
+    }
+
     def __init__(self):
         """初始化图像服务类"""
         self.ocr_pipeline = None
         self.table_pipeline = None
         self.seal_pipeline = None
         self.doc_pipeline = None
+        self.result_cache = ResultCache()
+        self._init_lock = threading.Lock()
         # self.default_device = 'gpu:0'  # 可配置化设备参数
         self.default_device = 'cpu'  # 可配置化设备参数
 
@@ -34,46 +178,63 @@ class ImageService:
 
         return output_dir, session_id
 
+    def _create_pipeline(self, pipeline_name):
+        """按配置的批大小创建 PaddleX 管道，使一次 predict 能填满模型的 batch 维度"""
+        config = load_pipeline_config(pipeline_name)
+        config['batch_size'] = current_app.config.get('IMAGE_BATCH_SIZE', 1)
+
+        # 多进程部署时限制每个进程的算子线程数
+        pp_option = None
+        cpu_threads = current_app.config.get('INFERENCE_CPU_THREADS')
+        if cpu_threads:
+            pp_option = PaddlePredictorOption(cpu_threads=cpu_threads)
+
+        return create_pipeline(config=config, device=self.default_device, pp_option=pp_option)
+
     def _initialize_ocr_model(self):
         """初始化OCR模型管道"""
         try:
-            self.ocr_pipeline = create_pipeline(
-                pipeline="OCR",
-                device=self.default_device
-            )
+            self.ocr_pipeline = self._create_pipeline("OCR")
         except Exception as e:
             raise RuntimeError(f"OCR模型加载失败: {str(e)}")
 
     def _initialize_table_model(self):
         """初始化表格识别模型管道"""
         try:
-            self.table_pipeline = create_pipeline(
-                pipeline="table_recognition",
-                device=self.default_device
-            )
+            self.table_pipeline = self._create_pipeline("table_recognition")
         except Exception as e:
             raise RuntimeError(f"表格识别模型加载失败: {str(e)}")
 
     def _initialize_seal_model(self):
         """初始化表格识别模型管道"""
         try:
-            self.seal_pipeline = create_pipeline(
-                pipeline="seal_recognition",
-                device=self.default_device
-            )
+            self.seal_pipeline = self._create_pipeline("seal_recognition")
         except Exception as e:
             raise RuntimeError(f"印章识别模型加载失败: {str(e)}")
 
     def _initialize_doc_preprocessor_model(self):
         """初始化表格识别模型管道"""
         try:
-            self.doc_pipeline = create_pipeline(
-                pipeline="doc_preprocessor",
-                device=self.default_device
-            )
+            self.doc_pipeline = self._create_pipeline("doc_preprocessor")
         except Exception as e:
             raise RuntimeError(f"文档矫正模型加载失败: {str(e)}")
 
+    def ensure_pipeline(self, kind):
+        """按类型获取管道，未加载时先初始化"""
+        attr, initializer, _, _ = self.PIPELINES[kind]
+        if not getattr(self, attr):
+            # 后台预加载与首个请求可能同时到达，加锁避免重复加载
+            with self._init_lock:
+                if not getattr(self, attr):
+                    getattr(self, initializer)()
+        return getattr(self, attr)
+
+    def warmup_pipeline(self, kind):
+        """用一张空白图片跑一次推理，提前完成算子初始化与内存分配"""
+        pipeline = self.ensure_pipeline(kind)
+        dummy = np.full((64, 64, 3), 255, dtype=np.uint8)
+        list(pipeline.predict(input=dummy, **self.PIPELINES[kind][3]))
+
     def _get_file_paths(self, file_id, output_type='ocr'):
         """动态生成路径，支持目录型输出"""
         output_config = {
@@ -124,14 +285,283 @@ class ImageService:
         # print(paths)
         return paths
 
-    def process_ocr(self, paths):
+    def _iter_predictions(self, pipeline, units, batch_size=None, **predict_kwargs):
+        """
+        按批次把输入单元交给管道推理，按顺序逐个产出结果。
+        输入单元以生成器形式提供，只有当前批次的图像驻留内存。
+        :param pipeline: PaddleX 管道实例
+        :param units: 可迭代的 (文件序号, 页码, 管道输入, 缩放比例)，每个输入对应一个推理结果
+        :param batch_size: 每次送入管道的输入数量，默认读取 IMAGE_BATCH_SIZE
+        :return: 生成器，产出 (输入单元, 推理结果)
+        """
+        batch_size = max(1, int(batch_size or current_app.config.get('IMAGE_BATCH_SIZE', 1)))
+        units = iter(units)
+
+        while True:
+            batch = list(islice(units, batch_size))
+            if not batch:
+                return
+            results = pipeline.predict(input=[unit[2] for unit in batch], **predict_kwargs)
+            for unit, res in zip(batch, results):
+                yield unit, res
+
+    def _iter_units(self, paths, indexes, max_side):
+        """
+        把待推理的文件展开为输入单元：图片为一个单元，PDF 逐页光栅化为多个单元
+        :return: 生成器，产出 (文件序号, 页码或 None, 管道输入, 缩放比例)
+        """
+        dpi = current_app.config.get('PDF_RENDER_DPI', 200)
+        workers = current_app.config.get('PDF_RENDER_WORKERS', 1)
+
+        for idx in indexes:
+            item = paths[idx]
+            if is_pdf(item):
+                for page_no, image in iter_pdf_pages(item, dpi=dpi, workers=workers):
+                    image, scale = _downscale_array(image, max_side)
+                    yield idx, page_no, image, scale
+            else:
+                image, scale = _prepare_input(item, max_side)
+                yield idx, None, image, scale
+
+    def _run_cached(self, pipeline, kind, paths, output_dir, batch_size):
+        """
+        带结果缓存的推理流程：命中的文件直接还原产物，未命中的文件流式批量推理后写入缓存。
+        :param kind: 管道类型，对应 PIPELINES 中的键
+        :return: 与 paths 顺序一致的 (文件序号, 结果数据) 列表
+        """
+        _, _, pipeline_name, predict_kwargs = self.PIPELINES[kind]
+        max_side = current_app.config.get('IMAGE_MAX_SIDE', {}).get(kind)
+        dpi = current_app.config.get('PDF_RENDER_DPI', 200)
+        # 缩放上限与 PDF 渲染分辨率会影响结果，需要参与缓存键
+        key_params = {**predict_kwargs, 'max_side': max_side, 'pdf_dpi': dpi}
+        extract_page = getattr(self, f'_extract_{kind}_page')
+        use_cache = self.result_cache.enabled
+        keys, payloads, pending = [], {}, []
+
+        for idx, file_path in enumerate(paths):
+            subdir = os.path.join(output_dir, f'file_{idx}')
+            os.makedirs(subdir, exist_ok=True)
+
+            source = file_path.data if isinstance(file_path, InMemoryImage) else file_path
+            key = self.result_cache.make_key(source, pipeline_name, key_params) if use_cache else None
+            keys.append(key)
+            payload = self.result_cache.restore(key, subdir) if use_cache else None
+            if payload is None:
+                pending.append(idx)
+            else:
+                payloads[idx] = payload
+
+        def finish(idx, pages):
+            subdir = os.path.join(output_dir, f'file_{idx}')
+            payloads[idx] = self._write_result(kind, subdir, pages, is_pdf(paths[idx]))
+            if use_cache:
+                self.result_cache.store(keys[idx], subdir, payloads[idx])
+
+        # 页面逐个产出、逐个推理，每页结果立即转为结构化数据，不保留推理结果对象
+        current, pages = None, []
+        predictions = self._iter_predictions(
+            pipeline,
+            self._iter_units(paths, pending, max_side),
+            batch_size,
+            **predict_kwargs
+        )
+        for (idx, page_no, _, scale), res in predictions:
+            if idx != current:
+                if current is not None:
+                    finish(current, pages)
+                current, pages = idx, []
+            subdir = os.path.join(output_dir, f'file_{idx}')
+            pages.append(extract_page(res, subdir, len(pages), scale))
+        if current is not None:
+            finish(current, pages)
+
+        # 没有任何页面的 PDF
+        for idx in pending:
+            if idx not in payloads:
+                finish(idx, [])
+
+        # 记录本次请求的输入位置（不进入缓存），按需渲染时作为底图
+        # 未落盘的内存输入没有底图，渲染时使用空白画布
+        for idx, file_path in enumerate(paths):
+            if isinstance(file_path, InMemoryImage):
+                file_path = file_path.path
+            source = {"input_path": os.path.abspath(file_path) if file_path else None}
+            if is_pdf(file_path):
+                source["pdf_dpi"] = dpi
+            with open(os.path.join(output_dir, f'file_{idx}', SOURCE_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump(source, f, ensure_ascii=False)
+
+        return [(idx, payloads[idx]) for idx in range(len(paths))]
+
+    @staticmethod
+    def _write_result(kind, subdir, pages, pdf=False):
+        """把结构化识别结果写入文件子目录（供按需渲染与缓存使用），返回结果数据"""
+        with open(os.path.join(subdir, RESULT_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump({"pages": pages}, f, ensure_ascii=False)
+
+        payload = {"pages": len(pages), "pdf": pdf}
+        if kind in ('ocr', 'seal'):
+            payload["page_texts"] = ["\n".join(page["texts"]) for page in pages]
+            payload["text"] = "\n".join(payload["page_texts"])
+        return payload
+
+    @staticmethod
+    def _ocr_page(ocr_res, scale=1.0, offset=(0, 0)):
+        """提取文本框、文本与置信度，坐标还原到原图"""
+        return {
+            "polys": _polys_to_list(ocr_res.get('rec_polys', []), scale, offset),
+            "texts": list(ocr_res.get('rec_texts', [])),
+            "scores": [round(float(score), 4) for score in ocr_res.get('rec_scores', [])],
+        }
+
+    def _extract_ocr_page(self, res, subdir, page_no, scale=1.0):
+        """OCR 单页结构化结果"""
+        return self._ocr_page(res, scale)
+
+    def _extract_table_page(self, res, subdir, page_no, scale=1.0):
+        """表格单页结构化结果，并导出该页的 xlsx"""
+        data_dir = os.path.join(subdir, 'data', f'page_{page_no}')
+        os.makedirs(data_dir, exist_ok=True)
+        res.save_to_xlsx(data_dir)
+
+        page = self._ocr_page(res.get('overall_ocr_res') or {}, scale)
+        page["tables"] = [
+            {
+                "cells": _polys_to_list(table.get('cell_box_list', []), scale),
+                "html": table.get('pred_html', ''),
+            }
+            for table in res.get('table_res_list', [])
+        ]
+        return page
+
+    @staticmethod
+    def _seal_offsets(res):
+        """各印章识别结果对应裁剪区域的左上角；未启用版面检测时印章识别作用于整页，偏移为 0"""
+        seals = res['seal_res_list']
+        boxes = [
+            box['coordinate'] for box in (res.get('layout_det_res') or {}).get('boxes', [])
+            if str(box.get('label', '')).lower() == 'seal'
+        ]
+        if len(boxes) != len(seals):
+            return [(0, 0)] * len(seals)
+        # 与 PaddleX 裁剪印章区域时的取整方式一致
+        return [(int(box[0]), int(box[1])) for box in boxes]
+
+    def _extract_seal_page(self, res, subdir, page_no, scale=1.0):
+        """印章单页结构化结果，合并页面上的所有印章（印章文本框相对于裁剪区域，先平移回整页坐标）"""
+        page = {"polys": [], "texts": [], "scores": []}
+        for seal, offset in zip(res['seal_res_list'], self._seal_offsets(res)):
+            seal_page = self._ocr_page(seal, scale, offset)
+            for field in page:
+                page[field].extend(seal_page[field])
+        return page
+
+    @staticmethod
+    def _extract_doc_page(res, subdir, page_no, scale=1.0):
+        """保存文档矫正后的单页图像"""
+        output_img = res['output_img']
+        if output_img.dtype != np.uint8:
+            output_img = output_img.astype(np.uint8)
+        cv2.imwrite(os.path.join(subdir, DOC_FILENAME.format(page=page_no)), output_img)
+        return {}
+
+    def render_overlay(self, kind, session_dir, filename):
+        """
+        按需渲染可视化图像：首次访问时根据结构化结果绘制并落盘，之后直接复用
+        :param kind: ocr / table / seal
+        :param session_dir: 会话输出目录
+        :param filename: 请求的相对路径，如 file_0/ocr_res_img_0.png
+        """
+        target = safe_join(session_dir, filename)
+        if target is None or os.path.exists(target):
+            return
+
+        file_dir, _, rest = filename.partition('/')
+        pattern = re.escape(OVERLAY_FILENAMES[kind]).replace(re.escape('{page}'), r'(\d+)')
+        match = re.fullmatch(pattern, rest)
+        result_path = os.path.join(session_dir, file_dir, RESULT_FILENAME)
+        if not match or not os.path.exists(result_path):
+            return
+
+        with open(result_path, 'r', encoding='utf-8') as f:
+            pages = json.load(f)['pages']
+        page_index = int(match.group(1))
+        if page_index >= len(pages):
+            return
+
+        image = self._load_source_image(os.path.join(session_dir, file_dir), page_index)
+        write_image(target, RENDERERS[kind](image, pages[page_index]))
+
+    @staticmethod
+    def _load_source_image(file_dir, page_index):
+        """读取渲染底图（PDF 按记录的分辨率重新渲染该页），原图已不可用时返回 None"""
+        try:
+            with open(os.path.join(file_dir, SOURCE_FILENAME), 'r', encoding='utf-8') as f:
+                source = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        input_path = source.get('input_path')
+        if not input_path or not os.path.exists(input_path):
+            return None
+        if is_pdf(input_path):
+            return render_page(input_path, page_index, source.get('pdf_dpi', 200))
+        return read_image(input_path) if page_index == 0 else None
+
+    def _overlay_urls(self, kind, endpoint, session_id, idx, pages):
+        """为每一页生成可视化图像 URL（图像在首次访问时才渲染）"""
+        return [
+            url_for(
+                endpoint,
+                filename=f"file_{idx}/{OVERLAY_FILENAMES[kind].format(page=page)}",
+                session_id=session_id,
+                _external=True
+            )
+            for page in range(pages)
+        ]
+
+    @staticmethod
+    def _page_details(payload, image_urls):
+        """PDF 输入按页返回文本与图像"""
+        return [
+            {
+                "page": page,
+                **({"text": payload["page_texts"][page]} if "page_texts" in payload else {}),
+                "image_url": image_urls[page],
+            }
+            for page in range(payload["pages"])
+        ]
+
+    def ocr_pdf_pages(self, path, page_numbers, batch_size=None):
+        """
+        识别 PDF 指定页面的文字，供文本提取为没有文字层的扫描页兜底
+        只渲染指定页面，不写入输出目录
+        :param page_numbers: 页码列表（从 0 开始）
+        :return: 与 page_numbers 顺序一致的文本列表
+        """
+        pipeline = self.ensure_pipeline('ocr')
+        dpi = current_app.config.get('PDF_RENDER_DPI', 200)
+        max_side = current_app.config.get('IMAGE_MAX_SIDE', {}).get('ocr')
+
+        def units():
+            for idx, page_no in enumerate(page_numbers):
+                image, scale = _downscale_array(render_page(path, page_no, dpi), max_side)
+                yield idx, page_no, image, scale
+
+        texts = [''] * len(page_numbers)
+        predictions = self._iter_predictions(pipeline, units(), batch_size, **self.PIPELINES['ocr'][3])
+        for (idx, _, _, _), res in predictions:
+            texts[idx] = "\n".join(res.get('rec_texts', []))
+        return texts
+
+    def process_ocr(self, paths, batch_size=None):
         """
         完整的OCR处理流程，处理多个文件路径。
-        :param paths: 一个包含多个文件路径的列表
+        :param paths: 一个包含多个文件路径（或 InMemoryImage）的列表，PDF 按页识别
+        :param batch_size: 批处理大小，默认读取 IMAGE_BATCH_SIZE
         :return: 包含每个文件OCR结果的字典列表
         """
-        if not self.ocr_pipeline:
-            self._initialize_ocr_model()
+        pipeline = self.ensure_pipeline('ocr')
 
         all_results = []
 
@@ -139,55 +569,30 @@ class ImageService:
             # 创建 OCR 总输出文件夹
             output_dir, session_id = self._create_output_directory('ocr')
 
-            for idx, file_path in enumerate(paths):
-                # 单独为每个文件创建子文件夹
-                image_subdir = os.path.join(output_dir, f'file_{idx}')
-                os.makedirs(image_subdir, exist_ok=True)
-
-                # 执行OCR识别
-                output = self.ocr_pipeline.predict(
-                    input=file_path,
-                    use_doc_orientation_classify=False,
-                    use_doc_unwarping=False,
-                    use_textline_orientation=False
-                )
-
-                # 复制生成器
-                img_saver, text_extractor = tee(output)
+            predictions = self._run_cached(pipeline, 'ocr', paths, output_dir, batch_size)
 
-                # 保存图像到该文件专属文件夹
-                for res in img_saver:
-                    res.save_to_img(save_path=image_subdir)
-
-                # 提取文本
-                results = list(text_extractor)[0]
-
-                # 构建图像 URL 列表
-                image_urls = [
-                    url_for(
-                        'image.get_ocr_output',
-                        filename=f'file_{idx}/{filename}',  # 注意添加子路径
-                        session_id=session_id,
-                        _external=True
-                    )
-                    for filename in os.listdir(image_subdir)
-                ]
+            for idx, payload in predictions:
+                image_urls = self._overlay_urls('ocr', 'image.get_ocr_output', session_id, idx, payload['pages'])
 
                 # 封装结果
-                all_results.append({
-                    "text": "\n".join(results['rec_texts']),
+                result = {
+                    "text": payload['text'],
                     "image_urls": image_urls
-                })
+                }
+                if payload['pdf']:
+                    result["pages"] = self._page_details(payload, image_urls)
+                all_results.append(result)
 
             return all_results
 
+        except FileNotFoundError:
+            raise
         except Exception as e:
             raise RuntimeError(f"OCR识别失败: {str(e)}")
 
-    def process_table_recognise(self, paths):
+    def process_table_recognise(self, paths, batch_size=None):
         """表格识别处理多个文件，结构与 OCR 保持一致"""
-        if not self.table_pipeline:
-            self._initialize_table_model()
+        pipeline = self.ensure_pipeline('table')
 
         all_results = []
 
@@ -195,134 +600,92 @@ class ImageService:
             # 创建总输出目录（session_id + 路径）
             output_dir, session_id = self._create_output_directory('table')
 
-            for idx, file_path in enumerate(paths):
-                # 每个文件一个子目录
-                sub_output_dir = os.path.join(output_dir, f'file_{idx}')
-                image_dir = os.path.join(sub_output_dir, 'images')
-                data_dir = os.path.join(sub_output_dir, 'data')
-                os.makedirs(image_dir, exist_ok=True)
-                os.makedirs(data_dir, exist_ok=True)
-
-                # 执行表格识别
-                output = self.table_pipeline.predict(
-                    input=file_path,
-                    use_doc_orientation_classify=False,
-                    use_doc_unwarping=False,
-                )
+            predictions = self._run_cached(pipeline, 'table', paths, output_dir, batch_size)
 
-                # 拷贝生成器
-                output_copy1, output_copy2 = tee(output)
-
-                # 保存图像 & xlsx
-                for res in output_copy1:
-                    res.save_to_img(image_dir)
-                    res.save_to_xlsx(data_dir)
+            for idx, payload in predictions:
+                # 每个文件一个子目录
+                data_dir = os.path.join(output_dir, f'file_{idx}', 'data')
 
                 # 构建图像 URL
-                image_urls = [
-                    url_for('image.get_table_output',
-                            filename=f'file_{idx}/images/{filename}',
-                            session_id=session_id,
-                            _external=True)
-                    for filename in os.listdir(image_dir) if filename.endswith('.png')
-                ]
-
-                # 构建数据下载 URL
-                downloads = [
-                    {
-                        "name": filename,
-                        "url": url_for('image.get_table_data',
-                                       filename=f'file_{idx}/data/{filename}',
-                                       session_id=session_id,
-                                       _external=True),
-                        "type": "excel" if filename.endswith('.xlsx') else "other"
-                    }
-                    for filename in os.listdir(data_dir)
-                    if os.path.isfile(os.path.join(data_dir, filename))
-                ]
+                image_urls = self._overlay_urls('table', 'image.get_table_output', session_id, idx, payload['pages'])
+
+                # 构建数据下载 URL（每页一个子目录）
+                downloads = []
+                for page in range(payload['pages']):
+                    page_dir = os.path.join(data_dir, f'page_{page}')
+                    if not os.path.isdir(page_dir):
+                        continue
+                    downloads.extend(
+                        {
+                            "name": filename,
+                            "page": page,
+                            "url": url_for('image.get_table_data',
+                                           filename=f'file_{idx}/data/page_{page}/{filename}',
+                                           session_id=session_id,
+                                           _external=True),
+                            "type": "excel" if filename.endswith('.xlsx') else "other"
+                        }
+                        for filename in os.listdir(page_dir)
+                        if os.path.isfile(os.path.join(page_dir, filename))
+                    )
 
                 # 汇总结果
-                all_results.append({
+                result = {
                     "image_urls": image_urls,
                     "download_url": downloads
-                })
+                }
+                if payload['pdf']:
+                    result["pages"] = self._page_details(payload, image_urls)
+                all_results.append(result)
 
             return all_results
 
+        except FileNotFoundError:
+            raise
         except Exception as e:
             raise RuntimeError(f"表格识别失败: {str(e)}")
 
-    def process_seal_recognise(self, paths):
-        if not self.seal_pipeline:
-            self._initialize_seal_model()
+    def process_seal_recognise(self, paths, batch_size=None):
+        pipeline = self.ensure_pipeline('seal')
 
         output_dir, session_id = self._create_output_directory('seal')
         all_results = []
 
-        for idx, input_path in enumerate(paths):
-            subdir = os.path.join(output_dir, f'file_{idx}')
-            os.makedirs(subdir, exist_ok=True)
-
-            output = self.seal_pipeline.predict(
-                input_path,
-                use_doc_orientation_classify=False,
-                use_doc_unwarping=False,
-            )
+        predictions = self._run_cached(pipeline, 'seal', paths, output_dir, batch_size)
 
-            o1, o2 = tee(output)
-            text_results = list(o1)[0]['seal_res_list'][0]['rec_texts']
-            output_img = list(o2)[0]['doc_preprocessor_res']['output_img']
-
-            image_path = os.path.join(subdir, 'result.png')
-            cv2.imwrite(image_path, output_img)
-
-            all_results.append({
-                "text": "\n".join(text_results),
-                "image_urls": [
-                    url_for(
-                        'image.get_seal_output',
-                        filename=f"file_{idx}/result.png",
-                        session_id=session_id,
-                        _external=True
-                    )
-                ]
-            })
+        for idx, payload in predictions:
+            image_urls = self._overlay_urls('seal', 'image.get_seal_output', session_id, idx, payload['pages'])
+            result = {
+                "text": payload['text'],
+                "image_urls": image_urls
+            }
+            if payload['pdf']:
+                result["pages"] = self._page_details(payload, image_urls)
+            all_results.append(result)
 
         return all_results
 
-    def process_doc(self, paths):
-        if not self.doc_pipeline:
-            self._initialize_doc_preprocessor_model()
+    def process_doc(self, paths, batch_size=None):
+        pipeline = self.ensure_pipeline('doc')
 
         output_dir, session_id = self._create_output_directory('doc')
         all_results = []
 
-        for idx, input_path in enumerate(paths):
-            subdir = os.path.join(output_dir, f'file_{idx}')
-            os.makedirs(subdir, exist_ok=True)
-
-            output = self.doc_pipeline.predict(
-                input=input_path,
-                use_doc_orientation_classify=False,
-                use_doc_unwarping=True,
-            )
-
-            output_img = list(output)[0]['output_img']
-            if output_img.dtype != np.uint8:
-                output_img = output_img.astype(np.uint8)
+        predictions = self._run_cached(pipeline, 'doc', paths, output_dir, batch_size)
 
-            image_path = os.path.join(subdir, 'result.png')
-            cv2.imwrite(image_path, output_img)
-
-            all_results.append({
-                "image_urls": [
-                    url_for(
-                        'image.get_correct_output',
-                        filename=f"file_{idx}/result.png",
-                        session_id=session_id,
-                        _external=True
-                    )
-                ]
-            })
+        for idx, payload in predictions:
+            image_urls = [
+                url_for(
+                    'image.get_correct_output',
+                    filename=f"file_{idx}/{DOC_FILENAME.format(page=page)}",
+                    session_id=session_id,
+                    _external=True
+                )
+                for page in range(payload['pages'])
+            ]
+            result = {"image_urls": image_urls}
+            if payload['pdf']:
+                result["pages"] = self._page_details(payload, image_urls)
+            all_results.append(result)
 
         return all_results
@@ -0,0 +1,146 @@
+# services/job_service.py (异步任务管理)
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from App.services.worker_pool import WorkerPoolBusy
+
+
+class JobQueueFull(RuntimeError):
+    """排队中的任务过多，调用方应稍后重试"""
+
+
+class JobManager:
+    """
+    长耗时批处理的异步任务管理
+    - 提交后立即返回任务 ID，任务在有界的后台线程池中逐个文件执行
+    - 每个文件完成后即可单独查询其结果
+    - 已结束的任务记录在 JOB_TTL_SECONDS 后被清除
+    """
+
+    def __init__(self):
+        self._app = None
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.max_pending = 0
+        self.ttl = 0
+
+    def init_app(self, app):
+        self._app = app
+        self.max_pending = app.config.get('JOB_MAX_PENDING', 32)
+        self.ttl = app.config.get('JOB_TTL_SECONDS', 3600)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('JOB_MAX_WORKERS', 2),
+            thread_name_prefix='job'
+        )
+
+    def submit(self, task, paths, run_file, base_url=None):
+        """
+        提交任务
+        :param task: 任务类型名称，如 image.table
+        :param paths: 文件路径列表
+        :param run_file: 回调 (文件路径) -> 单个文件的结果，复用现有服务方法
+        :param base_url: 原请求的 host，用于在后台线程中生成外链 URL
+        :return: 任务记录
+        :raises JobQueueFull: 未结束的任务数已达上限
+        """
+        self._evict_expired()
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+            if active >= self.max_pending:
+                raise JobQueueFull("任务队列已满，请稍后重试")
+
+            job = {
+                "id": uuid.uuid4().hex,
+                "task": task,
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "files": [
+                    {"index": idx, "path": path, "status": "pending", "result": None, "error": None}
+                    for idx, path in enumerate(paths)
+                ]
+            }
+            self._jobs[job["id"]] = job
+
+        self._executor.submit(self._run, job, run_file, base_url)
+        return self.describe(job)
+
+    def _run(self, job, run_file, base_url):
+        job["status"] = "running"
+        job["started_at"] = time.time()
+
+        context = (
+            self._app.test_request_context('/', base_url=base_url)
+            if base_url else self._app.app_context()
+        )
+        with context:
+            for entry in job["files"]:
+                entry["status"] = "running"
+                try:
+                    entry["result"] = self._run_with_retry(run_file, entry["path"])
+                    entry["status"] = "done"
+                except Exception as e:
+                    entry["error"] = str(e)
+                    entry["status"] = "failed"
+                    self._app.logger_custom.error(f"任务 {job['id']} 文件 {entry['path']} 处理失败: {str(e)}")
+
+        failed = bool(job["files"]) and all(entry["status"] == "failed" for entry in job["files"])
+        job["status"] = "failed" if failed else "finished"
+        job["finished_at"] = time.time()
+
+    @staticmethod
+    def _run_with_retry(run_file, path):
+        """推理进程池繁忙时等待空位，而不是让整个任务失败"""
+        delay = 0.5
+        while True:
+            try:
+                return run_file(path)
+            except WorkerPoolBusy:
+                time.sleep(delay)
+                delay = min(delay * 2, 10)
+
+    def get(self, job_id):
+        self._evict_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def describe(job, include_results=True):
+        """任务概要：整体状态与每个文件的进度"""
+        files = job["files"]
+        completed = sum(1 for entry in files if entry["status"] in ("done", "failed"))
+        return {
+            "job_id": job["id"],
+            "task": job["task"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "progress": {"completed": completed, "total": len(files)},
+            "files": [
+                {
+                    "index": entry["index"],
+                    "status": entry["status"],
+                    **({"result": entry["result"]} if include_results and entry["status"] == "done" else {}),
+                    **({"error": entry["error"]} if entry["error"] else {}),
+                }
+                for entry in files
+            ]
+        }
+
+    def _evict_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] and now - job["finished_at"] > self.ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+job_manager = JobManager()
@@ -0,0 +1,188 @@
+# services/llm_cache.py (大模型响应缓存)
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+from App.utils import LRUCache
+
+# 缓存格式版本，键的组成变化时递增使旧缓存失效
+CACHE_VERSION = 1
+
+
+class LLMResponseCache:
+    """
+    大模型响应缓存
+    - 键：提示词（模板 + 提取的文本）、模型、接口地址、temperature、max_tokens 的 SHA-256
+    - 内存层：按条目数限制的 LRU
+    - 持久层：OUTPUT_FOLDER/cache/llm_cache.sqlite3，过期（LLM_CACHE_TTL_SECONDS）条目不再命中，
+      总大小超过 LLM_CACHE_DISK_MB 时按最近访问时间淘汰
+    """
+
+    def __init__(self):
+        self._memory = None
+        self._db_path = None
+        self._lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+        }
+
+    # ---------- 配置 ----------
+
+    @property
+    def enabled(self):
+        return current_app.config.get('LLM_CACHE_ENABLED', True)
+
+    @property
+    def ttl(self):
+        return current_app.config.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)
+
+    def _get_memory(self):
+        if self._memory is None:
+            self._memory = LRUCache(max_size=current_app.config.get('LLM_CACHE_MEMORY_ENTRIES', 256))
+        return self._memory
+
+    @contextmanager
+    def _connect(self):
+        """打开持久层连接，成功时提交并总是关闭；每次操作使用独立连接，可在多个线程中并发调用"""
+        if self._db_path is None:
+            cache_dir = os.path.join(current_app.config['OUTPUT_FOLDER'], 'cache')
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db_path = os.path.join(cache_dir, 'llm_cache.sqlite3')
+            conn = sqlite3.connect(self._db_path)
+            with conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS responses ('
+                    'key TEXT PRIMARY KEY, content TEXT NOT NULL, size INTEGER NOT NULL, '
+                    'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+            conn.close()
+        conn = sqlite3.connect(self._db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------- 键 ----------
+
+    @staticmethod
+    def make_key(messages, model, base_url, temperature, max_tokens):
+        payload = json.dumps(
+            {
+                "v": CACHE_VERSION,
+                "messages": messages,
+                "model": model,
+                "base_url": base_url,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ---------- 读写 ----------
+
+    def get(self, key):
+        """命中返回缓存的响应文本，未命中或已过期返回 None"""
+        now = time.time()
+        entry = self._get_memory().get(key)
+        if entry is not None and now - entry[1] <= self.ttl:
+            self._count('memory_hits')
+            return entry[0]
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT content, created_at FROM responses WHERE key = ? AND created_at >= ?',
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        except sqlite3.Error:
+            row = None
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        self._get_memory().set(key, (row[0], row[1]))
+        self._count('disk_hits')
+        return row[0]
+
+    def set(self, key, content):
+        now = time.time()
+        self._get_memory().set(key, (content, now))
+        max_bytes = current_app.config.get('LLM_CACHE_DISK_MB', 256) * 1024 * 1024
+        size = len(content.encode('utf-8'))
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses (key, content, size, created_at, accessed_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (key, content, size, now, now)
+                )
+                evicted = conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl,)).rowcount
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                if total > max_bytes:
+                    # 按最近访问时间从旧到新删除，直到低于容量上限
+                    victims, freed = [], 0
+                    for victim, victim_size in conn.execute(
+                            'SELECT key, size FROM responses WHERE key != ? ORDER BY accessed_at', (key,)):
+                        if total - freed <= max_bytes:
+                            break
+                        victims.append((victim,))
+                        freed += victim_size
+                    conn.executemany('DELETE FROM responses WHERE key = ?', victims)
+                    evicted += len(victims)
+        except sqlite3.Error:
+            return
+
+        with self._lock:
+            self.counters['stores'] += 1
+            self.counters['evictions'] += evicted
+
+    # ---------- 统计 ----------
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """返回命中/未命中计数、命中率及各层占用情况"""
+        with self._lock:
+            counters = dict(self.counters)
+        hits = counters['memory_hits'] + counters['disk_hits']
+        lookups = hits + counters['misses']
+
+        disk_entries = disk_bytes = None
+        if self._db_path is not None:
+            try:
+                with self._connect() as conn:
+                    disk_entries, disk_bytes = conn.execute(
+                        'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+                    ).fetchone()
+            except sqlite3.Error:
+                pass
+
+        memory = self._memory
+        return {
+            **counters,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(memory) if memory is not None else 0,
+            'disk_entries': disk_entries,
+            'disk_bytes': disk_bytes,
+        }
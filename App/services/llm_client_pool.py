@@ -0,0 +1,116 @@
+# services/llm_client_pool.py (大模型客户端连接池)
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from flask import current_app
+from openai import OpenAI
+
+
+class LLMClientPool:
+    """
+    按 (api_key, base_url) 复用的大模型客户端池
+    - 每个键对应一个 OpenAI 客户端及其 httpx 连接池，同一密钥的并发请求共享已建立的长连接
+    - 不同密钥之间从不共享客户端
+    - 超过 LLM_CLIENT_IDLE_SECONDS 未使用、且没有进行中请求的客户端被关闭；客户端总数超过
+      LLM_MAX_CLIENTS 时优先关闭最久未使用的空闲客户端
+    """
+
+    def __init__(self):
+        self._clients = {}  # key -> {"client", "in_use", "last_used"}
+        self._lock = threading.Lock()
+        self.counters = {'created': 0, 'reused': 0, 'evicted': 0}
+
+    @staticmethod
+    def _key(api_key, base_url):
+        # 池中不保存明文密钥
+        return hashlib.sha256(f"{api_key}|{base_url}".encode('utf-8')).hexdigest()
+
+    def _create_client(self, api_key, base_url):
+        config = current_app.config
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=config.get('LLM_MAX_CONNECTIONS', 20),
+                max_keepalive_connections=config.get('LLM_MAX_KEEPALIVE_CONNECTIONS', 10),
+                keepalive_expiry=config.get('LLM_KEEPALIVE_EXPIRY', 60),
+            ),
+            timeout=httpx.Timeout(
+                config.get('LLM_READ_TIMEOUT', 120),
+                connect=config.get('LLM_CONNECT_TIMEOUT', 10),
+            ),
+        )
+        # 重试由 TextService 按配置统一处理，客户端自身不再重试
+        return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+    @contextmanager
+    def lease(self, api_key, base_url=None):
+        """
+        借出客户端，使用期间不会被空闲淘汰
+        :param api_key: 调用方的 API Key
+        :param base_url: 接口地址，默认读取 LLM_BASE_URL
+        """
+        if not api_key:
+            raise ValueError("缺少 apiKey")
+        base_url = base_url or current_app.config.get('LLM_BASE_URL')
+        key = self._key(api_key, base_url)
+
+        self._evict_idle(keep=key)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                entry = {"client": self._create_client(api_key, base_url), "in_use": 0, "last_used": 0}
+                self._clients[key] = entry
+                self.counters['created'] += 1
+            else:
+                self.counters['reused'] += 1
+            entry["in_use"] += 1
+
+        try:
+            yield entry["client"]
+        finally:
+            with self._lock:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.time()
+
+    def _evict_idle(self, keep=None):
+        """
+        淘汰空闲超时的客户端；池满时按最久未用淘汰，为即将新建的客户端腾出位置
+        :param keep: 即将借出的客户端键，不会被淘汰；已在池中时无需腾出位置
+        """
+        idle_seconds = current_app.config.get('LLM_CLIENT_IDLE_SECONDS', 600)
+        max_clients = current_app.config.get('LLM_MAX_CLIENTS', 32)
+        now = time.time()
+
+        victims = []
+        with self._lock:
+            idle = sorted(
+                (entry["last_used"], key) for key, entry in self._clients.items()
+                if entry["in_use"] == 0 and key != keep
+            )
+            incoming = 0 if keep in self._clients else 1
+            overflow = max(0, len(self._clients) + incoming - max_clients)
+            for last_used, key in idle:
+                if now - last_used > idle_seconds or overflow > 0:
+                    victims.append(self._clients.pop(key)["client"])
+                    overflow -= 1
+            self.counters['evicted'] += len(victims)
+
+        for client in victims:
+            client.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                'clients': len(self._clients),
+                'in_use': sum(entry["in_use"] for entry in self._clients.values()),
+            }
+
+    def close(self):
+        with self._lock:
+            clients = [entry["client"] for entry in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            client.close()
@@ -0,0 +1,180 @@
+# services/llm_metrics.py (大模型调用统计)
+import hashlib
+import threading
+import time
+from collections import deque
+
+# 每个维度保留最近的延迟样本数，用于计算分位数
+LATENCY_SAMPLES = 1000
+
+
+def key_fingerprint(api_key):
+    """API Key 的不可逆短标识，统计与日志中不出现明文密钥"""
+    if not api_key:
+        return 'anonymous'
+    return 'key_' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class _Totals:
+    """一组调用的累计值"""
+
+    def __init__(self, keep_samples=False):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = 0.0
+        self.ttft = 0.0
+        self.ttft_count = 0
+        self.samples = deque(maxlen=LATENCY_SAMPLES) if keep_samples else None
+
+    def add(self, sample):
+        self.calls += 1
+        self.errors += sample['error']
+        self.cache_hits += sample['cache'] == 'hit'
+        self.cache_misses += sample['cache'] == 'miss'
+        self.prompt_tokens += sample['prompt_tokens']
+        self.completion_tokens += sample['completion_tokens']
+        self.latency += sample['latency']
+        if sample['ttft'] is not None:
+            self.ttft += sample['ttft']
+            self.ttft_count += 1
+        if self.samples is not None and sample['cache'] != 'hit':
+            self.samples.append(sample['latency'])
+
+    def snapshot(self):
+        lookups = self.cache_hits + self.cache_misses
+        result = {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'avg_latency_ms': round(self.latency / self.calls * 1000, 1) if self.calls else None,
+            'avg_ttft_ms': round(self.ttft / self.ttft_count * 1000, 1) if self.ttft_count else None,
+        }
+        if self.samples is not None:
+            for pct in (50, 95, 99):
+                value = _percentile(self.samples, pct)
+                result[f'p{pct}_latency_ms'] = round(value * 1000, 1) if value is not None else None
+        return result
+
+
+class LLMMetrics:
+    """
+    进程内的大模型调用统计，按接口与按 API Key 两个维度聚合
+    - 每次调用：prompt/completion token、首 token 耗时、总耗时、是否命中缓存、是否失败
+    - 重试次数单独累计
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._keys = {}
+
+    def _targets(self, endpoint, key_id):
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = _Totals(keep_samples=True)
+        if key_id not in self._keys:
+            self._keys[key_id] = _Totals()
+        return self._endpoints[endpoint], self._keys[key_id]
+
+    def record(self, endpoint, key_id, sample):
+        with self._lock:
+            for totals in self._targets(endpoint, key_id):
+                totals.add(sample)
+
+    def record_retry(self, endpoint, key_id):
+        with self._lock:
+            for totals in self._targets(endpoint, key_id):
+                totals.retries += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'endpoints': {name: totals.snapshot() for name, totals in self._endpoints.items()},
+                'keys': {key_id: totals.snapshot() for key_id, totals in self._keys.items()},
+            }
+
+    def usage(self, endpoint, api_key, parent=None):
+        """创建单个请求（或单个文件）的调用记录器"""
+        return LLMUsage(self, endpoint, key_fingerprint(api_key), parent)
+
+
+class LLMUsage:
+    """
+    单个请求的调用记录器：汇总本次请求内所有大模型调用（含分段与重试），
+    同时写入全局统计；子记录器（如多文件中的单个文件）的调用会计入父记录器
+    """
+
+    def __init__(self, metrics, endpoint, key_id, parent=None):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.key_id = key_id
+        self.parent = parent
+        self.started = time.perf_counter()
+        self._totals = _Totals()
+        self._lock = threading.Lock()
+
+    def child(self):
+        return LLMUsage(self.metrics, self.endpoint, self.key_id, parent=self)
+
+    def _add(self, sample):
+        with self._lock:
+            self._totals.add(sample)
+        if self.parent is not None:
+            self.parent._add(sample)
+
+    def _add_retry(self):
+        with self._lock:
+            self._totals.retries += 1
+        if self.parent is not None:
+            self.parent._add_retry()
+
+    def record(self, latency, ttft=None, prompt_tokens=0, completion_tokens=0, cache='bypass', error=False):
+        """
+        记录一次调用
+        :param cache: hit / miss / bypass（未启用缓存）
+        """
+        sample = {
+            'latency': latency,
+            'ttft': ttft,
+            'prompt_tokens': prompt_tokens or 0,
+            'completion_tokens': completion_tokens or 0,
+            'cache': cache,
+            'error': bool(error),
+        }
+        self._add(sample)
+        self.metrics.record(self.endpoint, self.key_id, sample)
+
+    def retry(self):
+        self._add_retry()
+        self.metrics.record_retry(self.endpoint, self.key_id)
+
+    def summary(self):
+        """附加到响应中的用量摘要"""
+        with self._lock:
+            totals = self._totals
+            return {
+                'calls': totals.calls,
+                'cache_hits': totals.cache_hits,
+                'retries': totals.retries,
+                'errors': totals.errors,
+                'prompt_tokens': totals.prompt_tokens,
+                'completion_tokens': totals.completion_tokens,
+                'llm_time_ms': round(totals.latency * 1000, 1),
+                'ttft_ms': round(totals.ttft / totals.ttft_count * 1000, 1) if totals.ttft_count else None,
+                'wall_time_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            }
@@ -0,0 +1,122 @@
+# services/model_registry.py (模型注册表与预热)
+import threading
+import time
+
+from App.utils import get_memory_usage_mb
+
+
+class ModelRegistry:
+    """
+    统一管理各服务持有的模型：
+    - 应用启动时按 PRELOAD_MODELS 在后台线程中预加载并预热
+    - 记录每个模型的加载耗时、预热耗时与内存增量
+    - 只有所选模型全部预热完成后才视为就绪
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._status = {}
+        self._selected = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, name, load, warmup=None):
+        """
+        登记一个模型
+        :param name: 模型名称（与 PRELOAD_MODELS 中的取值对应）
+        :param load: 无参回调，加载模型
+        :param warmup: 无参回调，执行一次假推理
+        """
+        with self._lock:
+            self._models[name] = {'load': load, 'warmup': warmup}
+            self._status.setdefault(name, {'state': 'not_loaded'})
+
+    def init_app(self, app, preload=True):
+        """读取配置并在后台线程中开始预加载"""
+        selected = [name for name in app.config.get('PRELOAD_MODELS', []) if name]
+        unknown = [name for name in selected if name not in self._models]
+        if unknown:
+            app.logger_custom.warn(f"未注册的预加载模型将被忽略: {unknown}")
+        self._selected = [name for name in selected if name in self._models]
+
+        if not preload or not self._selected:
+            return
+
+        self._thread = threading.Thread(
+            target=self.preload,
+            args=(app,),
+            name='model-preload',
+            daemon=True
+        )
+        self._thread.start()
+
+    def preload(self, app):
+        """依次加载并预热所选模型（阻塞调用）"""
+        warmup = app.config.get('MODEL_WARMUP', True)
+        with app.app_context():
+            for name in self._selected:
+                self.load(name, warmup=warmup, logger=app.logger_custom)
+
+    def load(self, name, warmup=True, logger=None):
+        """加载并预热单个模型，返回其状态记录"""
+        model = self._models[name]
+        self._set_status(name, state='loading')
+
+        memory_before = get_memory_usage_mb()
+        start = time.perf_counter()
+        try:
+            model['load']()
+        except Exception as e:
+            self._set_status(name, state='failed', error=str(e))
+            if logger:
+                logger.error(f"模型 {name} 加载失败: {str(e)}")
+            return self.status()[name]
+        load_seconds = time.perf_counter() - start
+
+        warmup_seconds = None
+        warmup_error = None
+        if warmup and model['warmup']:
+            start = time.perf_counter()
+            try:
+                model['warmup']()
+            except Exception as e:
+                # 预热失败不影响模型可用，仅记录
+                warmup_error = str(e)
+            warmup_seconds = time.perf_counter() - start
+
+        memory_after = get_memory_usage_mb()
+        memory_mb = None
+        if memory_before is not None and memory_after is not None:
+            memory_mb = round(memory_after - memory_before, 1)
+
+        self._set_status(
+            name,
+            state='ready',
+            load_seconds=round(load_seconds, 3),
+            warmup_seconds=round(warmup_seconds, 3) if warmup_seconds is not None else None,
+            memory_mb=memory_mb,
+            warmup_error=warmup_error
+        )
+        if logger:
+            logger.info(f"模型 {name} 就绪: 加载 {load_seconds:.2f}s, 内存增量 {memory_mb} MB")
+        return self.status()[name]
+
+    def _set_status(self, name, **fields):
+        with self._lock:
+            self._status[name] = {k: v for k, v in fields.items() if v is not None}
+
+    def is_ready(self):
+        """所选模型是否全部就绪"""
+        with self._lock:
+            return all(self._status.get(name, {}).get('state') == 'ready' for name in self._selected)
+
+    def status(self):
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
+
+    @property
+    def selected(self):
+        return list(self._selected)
+
+
+model_registry = ModelRegistry()
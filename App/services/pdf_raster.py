@@ -0,0 +1,53 @@
+# services/pdf_raster.py (PDF 逐页光栅化)
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import fitz
+import numpy as np
+
+
+def is_pdf(item):
+    return isinstance(item, (str, os.PathLike)) and os.fspath(item).lower().endswith('.pdf')
+
+
+def _pixmap_to_bgr(pixmap):
+    image = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, pixmap.n)
+    if pixmap.n == 1:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+
+
+def render_page(path, page_no, dpi):
+    """把 PDF 的单页渲染为 BGR 数组"""
+    with fitz.open(path) as doc:
+        return _pixmap_to_bgr(doc[page_no].get_pixmap(dpi=dpi, alpha=False))
+
+
+def iter_pdf_pages(path, dpi=200, workers=1):
+    """
+    逐页光栅化 PDF 的生成器，按页序产出 (页码, BGR 数组)
+    - workers <= 1：在当前线程中边渲染边产出，内存中只保留一页
+    - workers > 1：多进程并行渲染，最多预取 2 * workers 页，消费方推理时后续页面同时在渲染
+    """
+    # PyMuPDF 不支持多线程；守护进程（如推理工作进程）不能再创建子进程
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        with fitz.open(path) as doc:
+            for page_no in range(doc.page_count):
+                yield page_no, _pixmap_to_bgr(doc[page_no].get_pixmap(dpi=dpi, alpha=False))
+        return
+
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = deque()
+        next_page = 0
+        while next_page < page_count or window:
+            while next_page < page_count and len(window) < workers * 2:
+                window.append((next_page, executor.submit(render_page, path, next_page, dpi)))
+                next_page += 1
+            page_no, future = window.popleft()
+            yield page_no, future.result()
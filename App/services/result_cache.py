@@ -0,0 +1,234 @@
+# services/result_cache.py (图像管道结果缓存)
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from flask import current_app
+
+from App.utils import LRUCache
+
+# 缓存格式版本，输出结构变化时递增使旧缓存失效
+CACHE_VERSION = 4
+META_FILENAME = 'meta.json'
+FILES_DIRNAME = 'files'
+
+
+class ResultCache:
+    """
+    内容寻址的图像管道结果缓存
+    - 键：输入文件字节 + 管道名称 + 推理参数 的 SHA-256
+    - 内存层：LRU，保存结果数据及产物文件字节
+    - 磁盘层：OUTPUT_FOLDER/cache 下按键分目录存放，超出容量时按最近访问时间淘汰
+    """
+
+    def __init__(self):
+        self._memory = None
+        self._disk_index = None  # key -> (大小, 最近访问时间)
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+        }
+
+    # ---------- 配置 ----------
+
+    @property
+    def enabled(self):
+        return current_app.config.get('RESULT_CACHE_ENABLED', True)
+
+    def _cache_dir(self):
+        return os.path.join(current_app.config['OUTPUT_FOLDER'], 'cache')
+
+    def _get_memory(self):
+        if self._memory is None:
+            max_bytes = current_app.config.get('RESULT_CACHE_MEMORY_MB', 64) * 1024 * 1024
+            self._memory = LRUCache(
+                max_size=max_bytes,
+                size_fn=lambda entry: sum(len(data) for data in entry['files'].values()) + 1024
+            )
+        return self._memory
+
+    def _entry_dir(self, key):
+        return os.path.join(self._cache_dir(), key[:2], key)
+
+    # ---------- 键 ----------
+
+    def make_key(self, source, pipeline_name, predict_kwargs):
+        """
+        根据输入内容、管道名称与推理参数生成缓存键
+        :param source: 输入文件路径，或已读入内存的文件字节
+        """
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_VERSION}|{pipeline_name}|".encode('utf-8'))
+        digest.update(json.dumps(predict_kwargs, sort_keys=True).encode('utf-8'))
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            digest.update(source)
+        else:
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    # ---------- 读写 ----------
+
+    def restore(self, key, target_dir):
+        """
+        命中时把缓存的产物文件还原到 target_dir，并返回结果数据；未命中返回 None
+        """
+        entry = self._get_memory().get(key)
+        if entry is not None:
+            for rel_path, data in entry['files'].items():
+                dst = os.path.join(target_dir, rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                with open(dst, 'wb') as f:
+                    f.write(data)
+            self._count('memory_hits')
+            return entry['payload']
+
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILENAME)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._count('misses')
+            return None
+
+        files_dir = os.path.join(entry_dir, FILES_DIRNAME)
+        try:
+            for rel_path in meta['files']:
+                self._link_or_copy(os.path.join(files_dir, rel_path), os.path.join(target_dir, rel_path))
+        except FileNotFoundError:
+            # 磁盘条目在读取过程中被淘汰
+            self._count('misses')
+            return None
+
+        os.utime(meta_path)
+        with self._lock:
+            if self._disk_index is not None and key in self._disk_index:
+                self._disk_index[key] = (self._disk_index[key][0], time.time())
+        self._count('disk_hits')
+        return meta['payload']
+
+    def store(self, key, source_dir, payload):
+        """把 source_dir 下的产物文件与结果数据写入内存层和磁盘层"""
+        files = {}
+        for root, _, filenames in os.walk(source_dir):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, source_dir).replace(os.sep, '/')] = f.read()
+
+        self._get_memory().set(key, {'payload': payload, 'files': files})
+
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        files_dir = os.path.join(tmp_dir, FILES_DIRNAME)
+        try:
+            for rel_path, data in files.items():
+                dst = os.path.join(files_dir, rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                with open(dst, 'wb') as f:
+                    f.write(data)
+            os.makedirs(tmp_dir, exist_ok=True)
+            with open(os.path.join(tmp_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump({'payload': payload, 'files': list(files)}, f, ensure_ascii=False)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        entry_size = sum(len(data) for data in files.values())
+        self._count('stores')
+        self._register_disk_entry(key, entry_size)
+
+    # ---------- 磁盘容量管理 ----------
+
+    def _load_disk_index(self):
+        """首次使用时扫描缓存目录，建立条目大小与访问时间索引"""
+        index = {}
+        cache_dir = self._cache_dir()
+        if os.path.isdir(cache_dir):
+            for prefix in os.scandir(cache_dir):
+                if not prefix.is_dir():
+                    continue
+                for entry in os.scandir(prefix.path):
+                    meta_path = os.path.join(entry.path, META_FILENAME)
+                    if not entry.is_dir() or not os.path.exists(meta_path):
+                        continue
+                    size = 0
+                    for root, _, filenames in os.walk(os.path.join(entry.path, FILES_DIRNAME)):
+                        size += sum(os.path.getsize(os.path.join(root, name)) for name in filenames)
+                    index[entry.name] = (size, os.path.getmtime(meta_path))
+        self._disk_index = index
+        self._disk_size = sum(size for size, _ in index.values())
+
+    def _register_disk_entry(self, key, size):
+        max_bytes = current_app.config.get('RESULT_CACHE_DISK_MB', 1024) * 1024 * 1024
+        with self._lock:
+            if self._disk_index is None:
+                self._load_disk_index()
+            previous = self._disk_index.get(key)
+            if previous:
+                self._disk_size -= previous[0]
+            self._disk_index[key] = (size, time.time())
+            self._disk_size += size
+
+            victims = []
+            if self._disk_size > max_bytes:
+                for victim, (victim_size, _) in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+                    if self._disk_size <= max_bytes:
+                        break
+                    if victim == key:
+                        continue
+                    del self._disk_index[victim]
+                    self._disk_size -= victim_size
+                    victims.append(victim)
+                self.counters['evictions'] += len(victims)
+
+        for victim in victims:
+            shutil.rmtree(self._entry_dir(victim), ignore_errors=True)
+
+    # ---------- 辅助 ----------
+
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """优先使用硬链接还原产物，跨文件系统时退化为复制"""
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            os.link(src, dst)
+        except OSError:
+            if not os.path.exists(src):
+                raise FileNotFoundError(src)
+            shutil.copyfile(src, dst)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """返回命中/未命中计数及各层占用情况"""
+        with self._lock:
+            counters = dict(self.counters)
+            disk_entries = len(self._disk_index) if self._disk_index is not None else None
+            disk_bytes = self._disk_size if self._disk_index is not None else None
+        hits = counters['memory_hits'] + counters['disk_hits']
+        lookups = hits + counters['misses']
+        memory = self._memory
+        return {
+            **counters,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(memory) if memory is not None else 0,
+            'memory_bytes': memory.current_size if memory is not None else 0,
+            'disk_entries': disk_entries,
+            'disk_bytes': disk_bytes,
+        }
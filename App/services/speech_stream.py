@@ -0,0 +1,318 @@
+# services/speech_stream.py (WebSocket 实时语音识别)
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from vosk import KaldiRecognizer
+
+from App.services.audio_decode import SAMPLE_WIDTH, ffmpeg_pcm_command
+
+try:
+    from websockets.asyncio.server import serve
+    from websockets.exceptions import ConnectionClosed
+except ImportError:
+    serve = None
+    ConnectionClosed = Exception
+
+STREAM_PATH = '/audio/stream'
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_INTERNAL_ERROR = 1011
+CLOSE_TRY_AGAIN_LATER = 1013
+# 转码输出每次读取的字节数（16kHz 下约 0.25 秒）
+TRANSCODE_READ_BYTES = 8000
+# 会话结束时等待接收任务退出的秒数
+RECEIVER_STOP_TIMEOUT = 5
+
+
+def _accept(recognizer, chunk):
+    """送入一段 PCM，返回 ('result', 完整句子) 或 ('partial', 当前中间结果)"""
+    if recognizer.AcceptWaveform(chunk):
+        return 'result', json.loads(recognizer.Result()).get('text', '').replace(" ", '')
+    return 'partial', json.loads(recognizer.PartialResult()).get('partial', '').replace(" ", '')
+
+
+def _final(recognizer):
+    return json.loads(recognizer.FinalResult()).get('text', '').replace(" ", '')
+
+
+def _is_eof(message):
+    return isinstance(message, str) and message.strip().lower() == 'eof'
+
+
+class _SampleAligner:
+    """网络分片不保证按采样边界切分，多出的半个采样留到下一片"""
+
+    def __init__(self):
+        self.carry = b''
+
+    def align(self, data):
+        if self.carry:
+            data = self.carry + data
+        cut = len(data) - len(data) % SAMPLE_WIDTH
+        self.carry = data[cut:]
+        return data[:cut]
+
+
+class SpeechStreamServer:
+    """
+    WebSocket 实时语音识别，在独立线程的事件循环中运行，使用与 HTTP 服务不同的端口
+    协议：
+    - 连接 ws://host:AUDIO_STREAM_PORT/audio/stream?format=pcm&sample_rate=16000&tier=fast
+      format=pcm：16 位单声道小端 PCM；format=opus：ogg/webm 封装的 opus，由 ffmpeg 管道转码
+    - 客户端发送二进制音频分片，发送文本 "eof" 表示说完
+    - 服务端推送 {"type": "partial" | "result" | "final" | "error", "text": ...}，final 之后关闭连接
+    资源控制：
+    - 每个连接一个长期存在的识别器，同一档位的连接共用同一个模型
+    - 每个连接最多缓存 AUDIO_STREAM_QUEUE_CHUNKS 个待识别分片，识别跟不上时暂停读取，由 TCP 流控传导到客户端
+    - 同时进行的会话超过 AUDIO_STREAM_MAX_SESSIONS 时，新连接以 1013 关闭
+    """
+
+    def __init__(self):
+        self.app = None
+        self.audio_service = None
+        self.options = {}
+        self.running = False
+        self._executor = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._total = 0
+        self._rejected = 0
+
+    def init_app(self, app, audio_service):
+        """按配置在后台线程中启动 WebSocket 服务"""
+        config = app.config
+        if not config.get('AUDIO_STREAM_ENABLED', False):
+            return
+        if serve is None:
+            app.logger_custom.warn("未安装 websockets，实时语音识别服务未启动")
+            return
+
+        self.app = app
+        self.audio_service = audio_service
+        self.options = {
+            "host": config.get('AUDIO_STREAM_HOST', '0.0.0.0'),
+            "port": config.get('AUDIO_STREAM_PORT', 5601),
+            "max_sessions": config.get('AUDIO_STREAM_MAX_SESSIONS', 8),
+            "queue_chunks": config.get('AUDIO_STREAM_QUEUE_CHUNKS', 32),
+            "max_message_bytes": config.get('AUDIO_STREAM_MAX_MESSAGE_BYTES', 1024 * 1024),
+            "ffmpeg": config.get('FFMPEG_BINARY', 'ffmpeg'),
+        }
+        # 识别在线程中执行（原生代码释放 GIL），事件循环只负责收发；每个会话同一时刻只占用一个线程
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.options["max_sessions"],
+            thread_name_prefix='speech-stream'
+        )
+        self._thread = threading.Thread(target=self._run, name='speech-stream', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            # 多个 Web 进程（或调试模式下的重载进程）只有第一个能绑定端口
+            self.app.logger_custom.warn(f"实时语音识别服务未启动，端口 {self.options['port']} 不可用: {str(e)}")
+        finally:
+            self.running = False
+
+    async def _serve(self):
+        async with serve(
+            self._handle,
+            self.options["host"],
+            self.options["port"],
+            max_size=self.options["max_message_bytes"],
+            # 已接收未处理的消息上限，满后停止读取套接字
+            max_queue=self.options["queue_chunks"]
+        ) as server:
+            self.running = True
+            self.app.logger_custom.info(
+                f"实时语音识别服务已启动: ws://{self.options['host']}:{self.options['port']}{STREAM_PATH}"
+            )
+            await server.serve_forever()
+
+    def _acquire(self):
+        with self._lock:
+            if self._active >= self.options["max_sessions"]:
+                self._rejected += 1
+                return False
+            self._active += 1
+            self._total += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+
+    def status(self):
+        with self._lock:
+            return {
+                "running": self.running,
+                "path": STREAM_PATH,
+                "port": self.options.get("port"),
+                "active_sessions": self._active,
+                "max_sessions": self.options.get("max_sessions"),
+                "total_sessions": self._total,
+                "rejected_sessions": self._rejected,
+            }
+
+    async def _handle(self, websocket):
+        url = urlsplit(websocket.request.path)
+        if url.path.rstrip('/') != STREAM_PATH:
+            await websocket.close(CLOSE_POLICY_VIOLATION, "unknown path")
+            return
+        if not self._acquire():
+            await websocket.close(CLOSE_TRY_AGAIN_LATER, "too many streams, retry later")
+            return
+
+        try:
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            await self._session(websocket, params)
+        except ConnectionClosed:
+            # 客户端中途断开
+            pass
+        except Exception as e:
+            self.app.logger_custom.error(f"实时语音识别会话异常: {str(e)}")
+            try:
+                await websocket.send(json.dumps({"type": "error", "error": str(e)}, ensure_ascii=False))
+                await websocket.close(CLOSE_INTERNAL_ERROR, "recognition failed")
+            except ConnectionClosed:
+                pass
+        finally:
+            self._release()
+
+    def _create_recognizer(self, sample_rate, tier):
+        # 首个会话可能触发模型加载，需要应用上下文读取配置
+        with self.app.app_context():
+            model = self.audio_service.load_model(tier)
+        return KaldiRecognizer(model, sample_rate)
+
+    async def _session(self, websocket, params):
+        audio_format = params.get('format', 'pcm')
+        if audio_format not in ('pcm', 'opus'):
+            raise ValueError(f"不支持的音频格式: {audio_format}")
+        # opus 由 ffmpeg 重采样到服务默认采样率
+        sample_rate = self.audio_service.sample_rate
+        if audio_format == 'pcm':
+            sample_rate = int(params.get('sample_rate', sample_rate))
+
+        loop = asyncio.get_running_loop()
+        recognizer = await loop.run_in_executor(
+            self._executor, self._create_recognizer, sample_rate, params.get('tier')
+        )
+
+        chunks = asyncio.Queue(maxsize=self.options["queue_chunks"])
+        if audio_format == 'pcm':
+            receiver = asyncio.create_task(self._receive_pcm(websocket, chunks))
+        else:
+            receiver = asyncio.create_task(self._receive_transcoded(websocket, chunks, sample_rate))
+        try:
+            await self._recognize(websocket, recognizer, chunks)
+        finally:
+            receiver.cancel()
+            try:
+                # 接收任务在清理中卡住时不再等待，保证会话名额能释放
+                await asyncio.wait_for(asyncio.gather(receiver, return_exceptions=True), RECEIVER_STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.app.logger_custom.warn("实时语音识别接收任务未能及时结束")
+
+    async def _receive_pcm(self, websocket, chunks):
+        aligner = _SampleAligner()
+        cancelled = False
+        try:
+            async for message in websocket:
+                if _is_eof(message):
+                    break
+                if isinstance(message, bytes):
+                    data = aligner.align(message)
+                    if data:
+                        # 队列满时在此等待，不再读取新消息
+                        await chunks.put(data)
+        except ConnectionClosed:
+            pass
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # 被取消说明识别已结束，队列无人消费，不能再等待投递结束标记
+            if not cancelled:
+                await chunks.put(None)
+
+    async def _receive_transcoded(self, websocket, chunks, sample_rate):
+        """压缩音频写入 ffmpeg 标准输入，同时读取其输出的 PCM"""
+        process = await asyncio.create_subprocess_exec(
+            *ffmpeg_pcm_command(self.options["ffmpeg"], 'pipe:0', sample_rate),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+
+        async def feed():
+            try:
+                async for message in websocket:
+                    if _is_eof(message):
+                        break
+                    if isinstance(message, bytes):
+                        process.stdin.write(message)
+                        # ffmpeg 处理不过来时等待管道排空
+                        await process.stdin.drain()
+            except (ConnectionClosed, BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                process.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        aligner = _SampleAligner()
+        cancelled = False
+        try:
+            while True:
+                data = await process.stdout.read(TRANSCODE_READ_BYTES)
+                if not data:
+                    break
+                data = aligner.align(data)
+                if data:
+                    await chunks.put(data)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+            # 被取消说明识别已结束，队列无人消费，不能再等待投递结束标记
+            if not cancelled:
+                await chunks.put(None)
+
+    async def _recognize(self, websocket, recognizer, chunks):
+        loop = asyncio.get_running_loop()
+        last_partial = ''
+        finished = False
+        while not finished:
+            pending = [await chunks.get()]
+            # 识别落后时把已积压的分片合并为一次调用
+            while not chunks.empty() and pending[-1] is not None:
+                pending.append(chunks.get_nowait())
+            if pending[-1] is None:
+                pending.pop()
+                finished = True
+            if not pending:
+                continue
+
+            kind, text = await loop.run_in_executor(self._executor, _accept, recognizer, b''.join(pending))
+            if kind == 'result':
+                last_partial = ''
+                if text:
+                    await websocket.send(json.dumps({"type": "result", "text": text}, ensure_ascii=False))
+            elif text != last_partial:
+                last_partial = text
+                await websocket.send(json.dumps({"type": "partial", "text": text}, ensure_ascii=False))
+
+        text = await loop.run_in_executor(self._executor, _final, recognizer)
+        await websocket.send(json.dumps({"type": "final", "text": text}, ensure_ascii=False))
+        await websocket.close()
+
+
+speech_stream_server = SpeechStreamServer()
@@ -0,0 +1,116 @@
+# services/text_chunker.py (合同文本分段)
+import re
+from difflib import SequenceMatcher
+from itertools import zip_longest
+
+# 条款/章节标题：第X条、一、（一）、1. / 1.2 、A.
+CLAUSE_HEADING = re.compile(
+    r'^\s*('
+    r'第[一二三四五六七八九十百千零〇\d]+[章节条款部分]'
+    r'|[一二三四五六七八九十]+[、.．]'
+    r'|[（(][一二三四五六七八九十\d]+[)）]'
+    r'|\d+(?:\.\d+)*[、.．]'
+    r'|[A-Z][、.．]'
+    r')'
+)
+SENTENCE_END = re.compile(r'(?<=[。；;！？!?])')
+
+
+def split_clauses(text):
+    """按条款/章节标题把文本切分为条款列表，每个条款包含其标题行"""
+    clauses, current = [], []
+    for line in text.splitlines(keepends=True):
+        if current and CLAUSE_HEADING.match(line):
+            clauses.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        clauses.append(''.join(current))
+    return clauses
+
+
+def _split_long(text, max_chars):
+    """超长条款依次按段落、句子切分，仍超长时按长度硬切"""
+    if len(text) <= max_chars:
+        return [text]
+    for parts in (text.splitlines(keepends=True), [part for part in SENTENCE_END.split(text) if part]):
+        if len(parts) > 1:
+            return _pack([piece for part in parts for piece in _split_long(part, max_chars)], max_chars)
+    return [text[start:start + max_chars] for start in range(0, len(text), max_chars)]
+
+
+def _pack(pieces, max_chars):
+    """把有序的片段贪心合并为不超过 max_chars 的分段"""
+    chunks, current = [], ''
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ''
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(text, max_chars):
+    """
+    在条款边界处把文本切分为不超过 max_chars 的分段
+    :return: 分段列表，拼接后与原文一致
+    """
+    if len(text) <= max_chars:
+        return [text]
+    pieces = [piece for clause in split_clauses(text) for piece in _split_long(clause, max_chars)]
+    return _pack(pieces, max_chars)
+
+
+def _clause_key(clause):
+    """条款对齐用的键：标题编号 + 标题行开头，无标题时取开头文本"""
+    first_line = clause.strip().split('\n', 1)[0]
+    return re.sub(r'\s+', '', first_line)[:30]
+
+
+def align_clauses(old_clauses, new_clauses):
+    """
+    按条款标题对齐新旧两个版本
+    :return: 按原文顺序排列的 (旧版条款列表, 新版条款列表, 操作) 分组，操作为 SequenceMatcher 的 tag
+    """
+    matcher = SequenceMatcher(
+        None,
+        [_clause_key(clause) for clause in old_clauses],
+        [_clause_key(clause) for clause in new_clauses],
+        autojunk=False
+    )
+    groups = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            # 标题相同的条款逐条成组，便于后续分段
+            groups.extend(([old], [new], tag) for old, new in zip(old_clauses[i1:i2], new_clauses[j1:j2]))
+        else:
+            groups.append((old_clauses[i1:i2], new_clauses[j1:j2], tag))
+    return groups
+
+
+def chunk_pairs(old_text, new_text, max_chars):
+    """
+    把新旧两个版本切分为对齐的分段对，每侧不超过 max_chars
+    :return: [(旧版分段, 新版分段), ...]
+    """
+    pairs, old_buf, new_buf = [], '', ''
+    for old_group, new_group, _ in align_clauses(split_clauses(old_text), split_clauses(new_text)):
+        old_part, new_part = ''.join(old_group), ''.join(new_group)
+        if len(old_part) > max_chars or len(new_part) > max_chars:
+            if old_buf or new_buf:
+                pairs.append((old_buf, new_buf))
+                old_buf, new_buf = '', ''
+            pairs.extend(
+                zip_longest(chunk_text(old_part, max_chars), chunk_text(new_part, max_chars), fillvalue='')
+            )
+            continue
+        if len(old_buf) + len(old_part) > max_chars or len(new_buf) + len(new_part) > max_chars:
+            pairs.append((old_buf, new_buf))
+            old_buf, new_buf = '', ''
+        old_buf += old_part
+        new_buf += new_part
+    if old_buf or new_buf:
+        pairs.append((old_buf, new_buf))
+    return pairs
@@ -0,0 +1,96 @@
+# services/text_diff.py (合同比对本地预筛选)
+import re
+import time
+from difflib import SequenceMatcher
+
+CJK_CHAR = re.compile(r'[　-〿一-鿿＀-￯]')
+WHITESPACE = re.compile(r'\s+')
+OMITTED = "……（此处 {count} 段内容两个版本相同，已省略）……"
+
+
+def estimate_tokens(text):
+    """粗略估算 token 数：中文字符约 1 token/字，其他字符约 4 字符/token"""
+    cjk = len(CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _paragraphs(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _changed_opcodes(old_keys, new_keys):
+    """先去掉公共前后缀再对中间部分做序列比对，返回非 equal 的操作（坐标为全文段落序号）"""
+    prefix = 0
+    limit = min(len(old_keys), len(new_keys))
+    while prefix < limit and old_keys[prefix] == new_keys[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and old_keys[len(old_keys) - 1 - suffix] == new_keys[len(new_keys) - 1 - suffix]):
+        suffix += 1
+
+    matcher = SequenceMatcher(
+        None,
+        old_keys[prefix:len(old_keys) - suffix],
+        new_keys[prefix:len(new_keys) - suffix],
+        autojunk=False
+    )
+    return [
+        (tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def _reduce(paragraphs, keep):
+    """保留标记的段落，连续省略的段落合并为一行说明"""
+    lines, skipped = [], 0
+    for paragraph, kept in zip(paragraphs, keep):
+        if kept:
+            if skipped:
+                lines.append(OMITTED.format(count=skipped))
+                skipped = 0
+            lines.append(paragraph)
+        else:
+            skipped += 1
+    if skipped:
+        lines.append(OMITTED.format(count=skipped))
+    return "\n".join(lines)
+
+
+def prefilter(old_text, new_text, context=2):
+    """
+    按段落对齐新旧两个版本，去掉两版相同的段落，只保留变化段落及其前后 context 段上下文
+    段落比较忽略空白差异
+    :return: {"old", "new", "identical", "stats"}，stats 含段落数、变化处数、估算 token 与耗时
+    """
+    start = time.perf_counter()
+    old, new = _paragraphs(old_text), _paragraphs(new_text)
+    changes = _changed_opcodes(
+        [WHITESPACE.sub('', paragraph) for paragraph in old],
+        [WHITESPACE.sub('', paragraph) for paragraph in new]
+    )
+
+    old_keep, new_keep = [False] * len(old), [False] * len(new)
+    for _, i1, i2, j1, j2 in changes:
+        for i in range(max(0, i1 - context), min(len(old), i2 + context)):
+            old_keep[i] = True
+        for j in range(max(0, j1 - context), min(len(new), j2 + context)):
+            new_keep[j] = True
+
+    reduced_old, reduced_new = _reduce(old, old_keep), _reduce(new, new_keep)
+    original_tokens = estimate_tokens(old_text) + estimate_tokens(new_text)
+    sent_tokens = estimate_tokens(reduced_old) + estimate_tokens(reduced_new)
+    return {
+        "old": reduced_old,
+        "new": reduced_new,
+        "identical": not changes,
+        "stats": {
+            "paragraphs": [len(old), len(new)],
+            "changed_segments": len(changes),
+            "original_tokens": original_tokens,
+            "sent_tokens": sent_tokens,
+            "token_reduction": round(1 - sent_tokens / original_tokens, 4) if original_tokens else 0.0,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+    }
@@ -0,0 +1,192 @@
+# services/text_extractor.py (文档文本提取)
+import hashlib
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from flask import current_app
+
+from App.utils import LRUCache
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+# 提取逻辑变化时递增，使旧缓存失效
+EXTRACTOR_VERSION = 1
+WHITESPACE = re.compile(r'\s+')
+
+
+def _pdf_page_range(path, start, stop):
+    """在子进程中提取 [start, stop) 页的文本"""
+    with fitz.open(path) as doc:
+        return [doc[page_no].get_text() for page_no in range(start, stop)]
+
+
+def _extract_pdf_pymupdf(path, workers, min_parallel_pages):
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+        # PyMuPDF 不支持多线程；页数较少或在守护进程中时直接顺序提取
+        if workers <= 1 or page_count < min_parallel_pages or multiprocessing.current_process().daemon:
+            return [page.get_text() for page in doc]
+
+    # 大文件按连续页段分给多个进程，每个进程各自打开文档
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(_pdf_page_range, str(path), start, stop) for start, stop in ranges]
+        return [text for future in futures for text in future.result()]
+
+
+def _extract_pdf_pypdf2(path):
+    import PyPDF2
+
+    with open(path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return [page.extract_text() or '' for page in reader.pages]
+
+
+def _extract_docx(path):
+    """按正文顺序提取段落与表格，表格每行的单元格以制表符分隔"""
+    doc = Document(path)
+    lines = []
+    for child in doc.element.body.iterchildren():
+        tag = child.tag.rsplit('}', 1)[-1]
+        if tag == 'p':
+            lines.append(Paragraph(child, doc).text)
+        elif tag == 'tbl':
+            for row in Table(child, doc).rows:
+                cells = []
+                for cell in row.cells:
+                    # 合并单元格会在每一列重复出现，只保留一次
+                    if not cells or cell.text != cells[-1]:
+                        cells.append(cell.text)
+                lines.append("\t".join(cells))
+    return lines
+
+
+class TextExtractor:
+    """
+    文档文本提取
+    - PDF：优先使用 PyMuPDF，页数较多时多进程并行提取；PyMuPDF 不可用或失败时退回 PyPDF2
+    - DOCX：段落与表格按正文顺序提取
+    - 其他：按 UTF-8 文本读取
+    - PDF 中没有文字层的页面（扫描页）可交给 OCR 识别，有文字层的页面不做 OCR
+    - 结果按文件内容哈希缓存在内存 LRU 中，重复比对/提取同一文件时不再解析
+    """
+
+    def __init__(self, ocr=None):
+        """
+        :param ocr: 扫描页识别函数 (PDF 路径, 页码列表) -> 文本列表，None 表示不做 OCR 兜底
+        """
+        self.ocr = ocr
+        self._cache = None
+        self.ocr_pages = 0
+
+    def _get_cache(self):
+        if self._cache is None:
+            max_bytes = current_app.config.get('TEXT_CACHE_MEMORY_MB', 64) * 1024 * 1024
+            self._cache = LRUCache(
+                max_size=max_bytes,
+                size_fn=lambda pages: sum(len(page.encode('utf-8')) for page in pages) + 64
+            )
+        return self._cache
+
+    @property
+    def ocr_enabled(self):
+        return self.ocr is not None and current_app.config.get('TEXT_OCR_FALLBACK', True)
+
+    def content_hash(self, path):
+        # 是否做过 OCR 兜底会影响结果，需要参与缓存键
+        digest = hashlib.sha256(
+            f"v{EXTRACTOR_VERSION}|{Path(path).suffix.lower()}|ocr={self.ocr_enabled}|".encode('utf-8')
+        )
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def extract_pages(self, file_path):
+        """
+        提取文本并按页返回（非 PDF 文件整体视为一页）
+        :return: 每页文本的列表，文件不存在或解析失败时返回 None
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            print(f"文件不存在: {file_path}")
+            return None
+
+        try:
+            key = self.content_hash(file_path)
+            pages = self._get_cache().get(key)
+            if pages is None:
+                pages, complete = self._parse(file_path), True
+                if file_path.suffix.lower() == '.pdf' and self.ocr_enabled:
+                    pages, complete = self._ocr_fallback(file_path, pages)
+                # OCR 失败（如推理队列已满）时不缓存，下次请求重新识别
+                if complete:
+                    self._get_cache().set(key, pages)
+            return pages
+        except Exception as e:
+            print(f"文本提取失败 {file_path}: {str(e)}")
+            return None
+
+    def _ocr_fallback(self, file_path, pages):
+        """
+        找出文字过少的页面，只对这些页面做 OCR，并按页序合并回结果
+        :return: (每页文本, OCR 是否成功)
+        """
+        min_chars = current_app.config.get('TEXT_OCR_MIN_CHARS', 20)
+        missing = [page_no for page_no, text in enumerate(pages) if len(WHITESPACE.sub('', text)) < min_chars]
+        if not missing:
+            return pages, True
+
+        try:
+            texts = self.ocr(str(file_path), missing)
+        except Exception as e:
+            print(f"扫描页 OCR 失败 {file_path}: {str(e)}")
+            return pages, False
+
+        pages = list(pages)
+        for page_no, text in zip(missing, texts):
+            if text.strip():
+                pages[page_no] = text
+        self.ocr_pages += len(missing)
+        return pages, True
+
+    def extract(self, file_path):
+        """提取全文，页之间以换行连接"""
+        pages = self.extract_pages(file_path)
+        return None if pages is None else "\n".join(pages)
+
+    @staticmethod
+    def _parse(file_path):
+        suffix = file_path.suffix.lower()
+        if suffix == '.pdf':
+            if fitz is not None:
+                try:
+                    return _extract_pdf_pymupdf(
+                        file_path,
+                        current_app.config.get('TEXT_EXTRACT_WORKERS', 1),
+                        current_app.config.get('TEXT_PARALLEL_MIN_PAGES', 64)
+                    )
+                except Exception as e:
+                    print(f"PyMuPDF 提取失败，改用 PyPDF2 {file_path}: {str(e)}")
+            return _extract_pdf_pypdf2(file_path)
+        if suffix == '.docx':
+            return ["\n".join(_extract_docx(file_path))]
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return [f.read()]
+
+    def stats(self):
+        cache = self._cache
+        return {
+            'entries': len(cache) if cache is not None else 0,
+            'bytes': cache.current_size if cache is not None else 0,
+            'ocr_pages': self.ocr_pages,
+        }
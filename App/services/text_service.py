@@ -1,20 +1,37 @@
 import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Dict, List, Optional
-import PyPDF2
-from docx import Document
-from openai import OpenAI
 from flask import current_app
+from openai import APIConnectionError, APIStatusError, APITimeoutError
 
+from App.services.llm_cache import LLMResponseCache
+from App.services.llm_client_pool import LLMClientPool
+from App.services.llm_metrics import LLMMetrics
+from App.services.text_chunker import chunk_pairs, chunk_text
+from App.services.text_diff import prefilter
+from App.services.text_extractor import TextExtractor
 
-class TextService:
-    def __init__(self):
-        """初始化文本服务类"""
-        # self.api_key = "sk-5ee6f8fa40224f1f97de2f5afaf145d8"
-        # self.base_url = "https://api.deepseek.com"
 
-        self.api_key = None
-        self.base_url = None
+class TextService:
+    def __init__(self, ocr=None):
+        """
+        初始化文本服务类
+        :param ocr: 扫描页识别函数 (PDF 路径, 页码列表) -> 文本列表，用于没有文字层的 PDF 页面
+        """
+        # 按 (api_key, base_url) 复用的客户端，密钥由每个请求传入
+        self.clients = LLMClientPool()
+        # 大模型调用统计（token、耗时、重试、缓存命中），按接口与 API Key 聚合
+        self.llm_metrics = LLMMetrics()
+        # 相同提示词的大模型响应缓存
+        self.response_cache = LLMResponseCache()
+        # 文档文本提取，结果按文件内容哈希缓存
+        self.extractor = TextExtractor(ocr=ocr)
         # 专业合同版本比对提示词
         self.prompt_templates = {
             "contract_version_diff": {
@@ -133,82 +150,403 @@ class TextService:
                     ### 五、验证建议
                     1. 需人工复核字段：[...]
                     2. 建议补充材料：[...]"""
+            },
+            # 分段模式的汇总（reduce）提示词：合并各分段的分析结果
+            "contract_version_diff_reduce": {
+                "system": "你是一位资深合同审计专家。合同篇幅较长，已按条款分段完成新旧版本比对，请把各分段的比对结论汇总为一份完整报告。",
+                "user": """【任务说明】
+                    以下是同一对合同新旧版本按条款分段后得到的 {count} 份分段比对报告，请合并为一份完整报告：
+                    1. 合并同一条款的变更描述，去除重复内容
+                    2. 分段中没有实质变化的条目不再列出
+                    3. 影响等级以各分段中最严重的结论为准
+
+                    【分段报告】
+                    {parts}
+
+                    【输出要求】
+                    按分段报告相同的框架（核心条款变更、风险提示、修改建议）用中文输出一份完整报告。"""
+            },
+            "contract_key_info_extractor_reduce": {
+                "system": "你是一位资深合同分析师。合同篇幅较长，已按条款分段完成信息提取，请把各分段的提取结果合并为一份完整报告。",
+                "user": """【任务说明】
+                    以下是同一份合同按条款分段后得到的 {count} 份分段提取结果，请合并为一份完整报告：
+                    1. 某一分段标注【/】的字段，以其他分段提取到的值为准
+                    2. 不同分段对同一字段给出不同值时，列入"矛盾信息项"
+                    3. 所有分段均未找到的字段保留【/】
+
+                    【分段结果】
+                    {parts}
+
+                    【输出要求】
+                    按分段结果相同的框架（基础信息、签约方信息、核心条款、特别提示、验证建议）用中文输出一份完整报告。"""
             }
         }
 
-    def ensure_key(self, api_key: str, base_url: str):
-        if not self.api_key:
-            self.api_key = api_key
-        if not self.base_url:
-            self.base_url = base_url
+    def _call_options(self, endpoint, api_key):
+        """
+        单个请求的调用参数：重试与超时配置（需在应用上下文中调用，结果传给工作线程），
+        以及该请求的调用记录器
+        """
+        config = current_app.config
+        return {
+            "usage": self.llm_metrics.usage(endpoint, api_key),
+            "timeout": config.get('LLM_REQUEST_TIMEOUT', 120),
+            "file_timeout": config.get('LLM_FILE_TIMEOUT', 300),
+            "max_retries": config.get('LLM_MAX_RETRIES', 3),
+            "backoff": config.get('LLM_RETRY_BACKOFF', 1.0),
+        }
 
-    def _extract_text(self, file_path: str) -> Optional[str]:
-        """通用文本提取方法"""
-        # 确保 file_path 是 Path 对象
-        file_path = Path(file_path)
+    @staticmethod
+    def _retry_delay(error, attempt, backoff):
+        """指数退避加随机抖动，服务端给出 Retry-After 时以其为准"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(float(retry_after), 60)
+        except (TypeError, ValueError):
+            return backoff * (2 ** attempt) * (0.5 + random.random())
 
-        if not file_path.exists():
-            print(f"文件不存在: {file_path}")
-            return None
+    def _chat(self, client, messages, temperature, max_tokens, options, stream=False, cache='bypass'):
+        """
+        调用大模型，遇到 429 / 5xx / 连接错误 / 超时时按退避策略重试
+        单次请求不超过 timeout，同一文件的所有调用（含重试）合计不超过 file_timeout
+        :param options: _call_options() 的返回值（计划执行时另含 deadline）
+        :param stream: 为 True 时返回流式响应，仅在建立连接阶段重试；用量由 _stream_chat 记录
+        :param cache: 本次调用的缓存结果（miss / bypass），计入调用统计
+        """
+        usage = options["usage"]
+        start = time.perf_counter()
+        # 计划执行器按文件设置统一的截止时间，分段与汇总的所有调用共用；单独调用时从现在开始计时
+        deadline = options.get("deadline") or time.monotonic() + options["file_timeout"]
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                usage.record(time.perf_counter() - start, cache=cache, error=True)
+                raise TimeoutError(f"大模型调用超过单个文件的总时限（{options['file_timeout']}s）")
+            try:
+                response = client.chat.completions.create(
+                    model="deepseek-chat",
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=stream,
+                    timeout=max(1.0, min(options["timeout"], remaining)),
+                    # 流式响应在最后一个分片中返回 token 用量
+                    **({"stream_options": {"include_usage": True}} if stream else {})
+                )
+                break
+            except (APIConnectionError, APITimeoutError, APIStatusError) as e:
+                status = getattr(e, 'status_code', None)
+                retryable = status is None or status == 429 or status >= 500
+                delay = self._retry_delay(e, attempt, options["backoff"])
+                if not retryable or attempt >= options["max_retries"] or time.monotonic() + delay >= deadline:
+                    usage.record(time.perf_counter() - start, cache=cache, error=True)
+                    raise
+                usage.retry()
+                time.sleep(delay)
+                attempt += 1
+
+        if not stream:
+            tokens = response.usage
+            usage.record(
+                time.perf_counter() - start,
+                prompt_tokens=tokens.prompt_tokens if tokens else 0,
+                completion_tokens=tokens.completion_tokens if tokens else 0,
+                cache=cache
+            )
+        return response
 
+    def _stream_chat(self, client, messages, temperature, max_tokens, options, stop=None, cache='bypass'):
+        """
+        流式调用大模型，逐段产出文本增量，结束时记录首 token 耗时与 token 用量
+        :param stop: threading.Event，被设置时（如客户端断开）提前结束并关闭连接
+        """
+        start = time.perf_counter()
+        stream = self._chat(client, messages, temperature, max_tokens, options, stream=True, cache=cache)
+        ttft, tokens, failed = None, None, True
         try:
-            if file_path.suffix.lower() == '.pdf':
-                with open(file_path, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    return "\n".join([page.extract_text() for page in reader.pages])
-            elif file_path.suffix.lower() == '.docx':
-                doc = Document(file_path)
-                return "\n".join([para.text for para in doc.paragraphs])
-            else:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-        except Exception as e:
-            print(f"文本提取失败 {file_path}: {str(e)}")
+            for chunk in stream:
+                if stop is not None and stop.is_set():
+                    break
+                if chunk.usage:
+                    tokens = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    yield chunk.choices[0].delta.content
+            failed = False
+        finally:
+            stream.close()
+            options["usage"].record(
+                time.perf_counter() - start,
+                ttft=ttft,
+                prompt_tokens=tokens.prompt_tokens if tokens else 0,
+                completion_tokens=tokens.completion_tokens if tokens else 0,
+                cache=cache,
+                error=failed
+            )
+
+    def _cache_key(self, client, messages, temperature, max_tokens):
+        """响应缓存键，未启用缓存时返回 None"""
+        if not self.response_cache.enabled:
             return None
+        return self.response_cache.make_key(messages, "deepseek-chat", str(client.base_url), temperature, max_tokens)
+
+    def _complete(self, client, messages, temperature, max_tokens, options):
+        """带响应缓存的大模型调用，返回 (响应文本, 是否命中缓存)"""
+        start = time.perf_counter()
+        key = self._cache_key(client, messages, temperature, max_tokens)
+        if key:
+            content = self.response_cache.get(key)
+            if content is not None:
+                options["usage"].record(time.perf_counter() - start, cache='hit')
+                return content, True
+
+        response = self._chat(client, messages, temperature, max_tokens, options, cache='miss' if key else 'bypass')
+        content = response.choices[0].message.content
+        if key and content:
+            self.response_cache.set(key, content)
+        return content, False
+
+    def _stream_complete(self, client, messages, temperature, max_tokens, options, stop=None):
+        """
+        带响应缓存的流式调用，产出 (文本增量, 是否命中缓存)
+        命中时一次性产出完整响应；未命中时边生成边产出，完整结束后写入缓存
+        """
+        start = time.perf_counter()
+        key = self._cache_key(client, messages, temperature, max_tokens)
+        if key:
+            content = self.response_cache.get(key)
+            if content is not None:
+                elapsed = time.perf_counter() - start
+                options["usage"].record(elapsed, ttft=elapsed, cache='hit')
+                yield content, True
+                return
+
+        content = []
+        cache = 'miss' if key else 'bypass'
+        for delta in self._stream_chat(client, messages, temperature, max_tokens, options, stop, cache):
+            content.append(delta)
+            yield delta, False
+        # 被中断的响应不完整，不写入缓存
+        if key and content and not (stop is not None and stop.is_set()):
+            self.response_cache.set(key, "".join(content))
+
+    def metrics(self):
+        """大模型调用统计、响应缓存命中率与客户端池状态"""
+        return {
+            "llm": self.llm_metrics.snapshot(),
+            "cache": self.response_cache.stats(),
+            "clients": self.clients.stats(),
+            "extraction": self.extractor.stats(),
+        }
+
+    def _extract_text(self, file_path: str) -> Optional[str]:
+        """通用文本提取方法（按文件内容缓存）"""
+        return self.extractor.extract(file_path)
+
+    # ---------- 提示词组装与分段（map-reduce） ----------
+
+    @staticmethod
+    def _chunk_options(chunked=None):
+        """
+        分段模式配置（需在应用上下文中调用）
+        :param chunked: 请求级开关，None 表示使用 LLM_CHUNKED
+        """
+        config = current_app.config
+        return {
+            "enabled": config.get('LLM_CHUNKED', True) if chunked is None else bool(chunked),
+            "max_chars": config.get('LLM_CHUNK_CHARS', 8000),
+            "concurrency": config.get('LLM_CHUNK_CONCURRENCY', 4),
+        }
+
+    @staticmethod
+    def _messages(template, part=None, **fields):
+        """组装提示词；part 为 (序号, 总数) 时注明这是全文的哪一部分"""
+        content = template["user"].format(**fields)
+        if part:
+            content = f"【分段说明】以下内容为全文按条款切分后的第 {part[0]}/{part[1]} 部分，仅依据本部分作答。\n{content}"
+        return [
+            {"role": "system", "content": template["system"]},
+            {"role": "user", "content": content}
+        ]
+
+    def _compare_plan(self, paths, prompt_type, chunk, use_prefilter=None):
+        """
+        提取两份文件的文本并生成调用计划，返回 (计划, 错误信息)
+        计划为 {"messages"}（单次调用），或 {"map": [...], "reduce": 模板}（超长文本分段比对后汇总），
+        或 {"content"}（两版完全相同，无需调用大模型）
+        :param use_prefilter: 是否先在本地去掉两版相同的段落，None 表示使用 LLM_DIFF_PREFILTER
+        """
+        if len(paths) != 2:
+            return None, "目前仅支持两个文件的比对"
+        # 1. 提取文本内容
+        texts = []
+        for file_path in paths:
+            text = self._extract_text(file_path)
+            if not text:
+                return None, f"无法提取文件的内容"
+            texts.append(text)
+
+        # 2. 本地预筛选：只把变化的段落及少量上下文交给大模型
+        report = None
+        if current_app.config.get('LLM_DIFF_PREFILTER', True) if use_prefilter is None else use_prefilter:
+            diff = prefilter(texts[0], texts[1], current_app.config.get('LLM_DIFF_CONTEXT', 2))
+            report = diff["stats"]
+            current_app.logger_custom.info(
+                f"比对预筛选: 变化 {report['changed_segments']} 处，估算 token "
+                f"{report['original_tokens']} -> {report['sent_tokens']}，耗时 {report['elapsed_ms']} ms"
+            )
+            if diff["identical"]:
+                return {"content": "两个版本的合同内容一致，未发现差异。", "prefilter": report}, None
+            texts = [diff["old"], diff["new"]]
+
+        plan, template = {"prefilter": report}, self.prompt_templates[prompt_type]
+        if not chunk["enabled"] or max(len(text) for text in texts) <= chunk["max_chars"]:
+            # 不分段时按单次调用的长度上限截断（分段启用时此处文本本就不超过上限）
+            texts = [text[:chunk["max_chars"]] for text in texts]
+            plan["messages"] = self._messages(template, text1=texts[0], text2=texts[1])
+            return plan, None
+
+        # 新旧版本按条款标题对齐后分段，每段分别比对
+        pairs = chunk_pairs(texts[0], texts[1], chunk["max_chars"])
+        plan.update(
+            map=[
+                self._messages(template, (idx, len(pairs)), text1=old, text2=new)
+                for idx, (old, new) in enumerate(pairs, 1)
+            ],
+            reduce=self.prompt_templates[f"{prompt_type}_reduce"],
+            concurrency=chunk["concurrency"],
+        )
+        return plan, None
+
+    def _extract_plan(self, prompt_type, path, chunk):
+        """提取合同文本并生成调用计划，结构同 _compare_plan"""
+        text = self._extract_text(path)
+        if not text:
+            raise ValueError("无法提取文件的内容")
+        text = text.replace('\x0c', '').strip()
+
+        template = self.prompt_templates[prompt_type]
+        if not chunk["enabled"] or len(text) <= chunk["max_chars"]:
+            return {"messages": self._messages(template, text=text[:chunk["max_chars"]].strip())}
+
+        parts = chunk_text(text, chunk["max_chars"])
+        return {
+            "map": [self._messages(template, (idx, len(parts)), text=part) for idx, part in enumerate(parts, 1)],
+            "reduce": self.prompt_templates[f"{prompt_type}_reduce"],
+            "concurrency": chunk["concurrency"],
+        }
+
+    def _map_chunks(self, client, plan, temperature, max_tokens, options):
+        """并发分析各分段，返回与分段顺序一致的 [(响应文本, 是否命中缓存)]"""
+        app = current_app._get_current_object()
+
+        def run(messages):
+            with app.app_context():
+                return self._complete(client, messages, temperature, max_tokens, options)
+
+        workers = max(1, min(len(plan["map"]), plan["concurrency"]))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm-chunk') as executor:
+            return list(executor.map(run, plan["map"]))
+
+    def _reduce_messages(self, plan, partials):
+        parts = "\n\n".join(
+            f"-----第{idx}部分-----\n{content}" for idx, (content, _) in enumerate(partials, 1)
+        )
+        return self._messages(plan["reduce"], parts=parts, count=len(partials))
+
+    @staticmethod
+    def _with_deadline(options):
+        """为一个文件的调用计划设置截止时间，map 与 reduce 阶段的调用（含重试）合计不超过 file_timeout"""
+        return {**options, "deadline": time.monotonic() + options["file_timeout"]}
+
+    def _run_plan(self, client, plan, temperature, max_tokens, options):
+        """执行调用计划，返回 (响应文本, 是否全部命中缓存)"""
+        options = self._with_deadline(options)
+        if "content" in plan:
+            return plan["content"], False
+        if "messages" in plan:
+            return self._complete(client, plan["messages"], temperature, max_tokens, options)
+
+        # map：各分段并发分析，总耗时取决于最慢的分段；reduce：汇总为一份报告
+        partials = self._map_chunks(client, plan, temperature, max_tokens, options)
+        content, cached = self._complete(
+            client, self._reduce_messages(plan, partials), temperature, max_tokens, options
+        )
+        return content, cached and all(hit for _, hit in partials)
+
+    def _stream_plan(self, client, plan, temperature, max_tokens, options, stop=None):
+        """流式执行调用计划，产出 (文本增量, 是否命中缓存)；分段模式下流式输出 reduce 阶段"""
+        options = self._with_deadline(options)
+        if "content" in plan:
+            yield plan["content"], False
+            return
+        if "messages" in plan:
+            yield from self._stream_complete(client, plan["messages"], temperature, max_tokens, options, stop)
+            return
+
+        partials = self._map_chunks(client, plan, temperature, max_tokens, options)
+        map_cached = all(hit for _, hit in partials)
+        reduce_messages = self._reduce_messages(plan, partials)
+        for delta, cached in self._stream_complete(client, reduce_messages, temperature, max_tokens, options, stop):
+            yield delta, cached and map_cached
+
+    @staticmethod
+    def _chunk_count(plan):
+        """实际调用大模型的分段数，不含 reduce"""
+        if "content" in plan:
+            return 0
+        return len(plan["map"]) if "map" in plan else 1
+
+    def _compare_result(self, plan, content, cached, usage):
+        result = {"analysis": content, "cached": cached, "chunks": self._chunk_count(plan)}
+        if plan.get("prefilter"):
+            result["prefilter"] = plan["prefilter"]
+        result["usage"] = usage.summary()
+        return result
+
+    # ---------- 比对与提取 ----------
 
     def compare_documents(
             self,
             paths: List[str],
             prompt_type: str = "contract_version_diff",
-            max_tokens: int = 2000
+            max_tokens: int = 2000,
+            api_key: Optional[str] = None,
+            base_url: Optional[str] = None,
+            chunked: Optional[bool] = None,
+            use_prefilter: Optional[bool] = None
     ) -> Dict:
         """
         专业文档比对（使用大模型）
         :param file_ids: 需要比对的文件ID列表(支持2个文件)
         :param prompt_type: 使用的提示词模板
+        :param api_key: 调用方的 API Key
+        :param base_url: 接口地址，默认读取 LLM_BASE_URL
         :param max_tokens: 最大返回token数
+        :param chunked: 超长文本是否分段比对后汇总，None 表示使用 LLM_CHUNKED
+        :param use_prefilter: 是否只把变化的段落交给大模型，None 表示使用 LLM_DIFF_PREFILTER
         :return: 结构化比对结果
         """
-        if len(paths) != 2:
-            return {"error": "目前仅支持两个文件的比对"}
-        # 1. 提取文本内容
-        texts = []
-        for file_path in paths:
-            text = self._extract_text(file_path)
-            if not text:
-                return {"error": f"无法提取文件的内容"}
-            texts.append(text[:10000])  # 限制文本长度
-
-        template = self.prompt_templates[prompt_type]
+        plan, error = self._compare_plan(paths, prompt_type, self._chunk_options(chunked), use_prefilter)
+        if error:
+            return {"error": error}
 
         # 3. 调用大模型API
         try:
-            client = OpenAI(api_key=self.api_key, base_url=self.base_url)
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": template["system"]},
-                    {
-                        "role": "user",
-                        "content": template["user"].format(text1=texts[0], text2=texts[1])
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=max_tokens,
-                stream=False
-            )
+            options = self._call_options('compare', api_key)
+            with self.clients.lease(api_key, base_url) as client:
+                content, cached = self._run_plan(
+                    client,
+                    plan,
+                    temperature=0.3,
+                    max_tokens=max_tokens,
+                    options=options
+                )
             all_result = []
-            all_result.append({"analysis": response.choices[0].message.content})
+            all_result.append(self._compare_result(plan, content, cached, options["usage"]))
             return all_result
 
         except Exception as e:
@@ -219,59 +557,174 @@ class TextService:
             self,
             paths: List[str],
             prompt_type: str = "contract_key_info_extractor",
-            max_tokens: int = 2000
+            max_tokens: int = 2000,
+            api_key: Optional[str] = None,
+            base_url: Optional[str] = None,
+            chunked: Optional[bool] = None
     ) -> Dict:
         """
         合同核心信息提取（使用大模型），支持处理多个文件
         :param paths: 需要分析的多个文件路径
         :param prompt_type: 使用的提示词模板
         :param max_tokens: LLM返回最大token数
+        :param api_key: 调用方的 API Key
+        :param base_url: 接口地址，默认读取 LLM_BASE_URL
+        :param chunked: 超长合同是否分段提取后汇总，None 表示使用 LLM_CHUNKED
         :return: 每个文件的提取结果列表
         """
-        results = []
-
         # 模板准备
-        template = self.prompt_templates.get(prompt_type)
-        if not template:
+        if prompt_type not in self.prompt_templates:
             return {"error": f"未找到提示词模板: {prompt_type}"}
 
-        # 初始化大模型客户端
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        options = self._call_options('extract', api_key)
+        chunk = self._chunk_options(chunked)
+        concurrency = max(1, min(len(paths), current_app.config.get('LLM_EXTRACT_CONCURRENCY', 4)))
+        app = current_app._get_current_object()
+
+        def run(path):
+            # 工作线程中读取配置（缓存等）需要应用上下文
+            with app.app_context():
+                return self._extract_one(client, prompt_type, path, max_tokens, options, chunk)
+
+        # 借出复用的大模型客户端，同一密钥的请求共享长连接
+        with self.clients.lease(api_key, base_url) as client:
+            if concurrency <= 1:
+                return [self._extract_one(client, prompt_type, path, max_tokens, options, chunk) for path in paths]
+
+            # 多个文件并发调用大模型，map 保证结果与输入顺序一致
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='llm-extract') as executor:
+                return list(executor.map(run, paths))
+
+    def _extract_one(self, client, prompt_type, path, max_tokens, options, chunk):
+        """单个文件的合同信息提取，失败时返回错误信息而不抛出"""
+        # 每个文件单独汇总用量，同时计入整个请求
+        options = {**options, "usage": options["usage"].child()}
+        try:
+            # 1. 文本提取与预处理
+            plan = self._extract_plan(prompt_type, path, chunk)
+
+            # 2. 调用大模型 API
+            content, cached = self._run_plan(
+                client,
+                plan,
+                temperature=0.2,
+                max_tokens=max_tokens,
+                options=options
+            )
 
-        for path in paths:
-            try:
-                # 1. 文本提取与预处理
-                text = self._extract_text(path)
-                processed_text = text[:10000].replace('\x0c', '').strip()
+            # 3. 返回结果
+            return {
+                "analysis": content,
+                "cached": cached,
+                "chunks": self._chunk_count(plan),
+                "usage": options["usage"].summary(),
+            }
 
-                # 2. 调用大模型 API
-                response = client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": template["system"]},
-                        {
-                            "role": "user",
-                            "content": template["user"].format(text=processed_text)
-                        }
-                    ],
-                    temperature=0.2,
-                    max_tokens=max_tokens,
-                    stream=False
-                )
+        except Exception as e:
+            print(f"[合同解析失败] 文件: {path}, 错误: {str(e)}")
+            return {
+                "file_path": path,
+                "status": "failed",
+                "error": f"合同解析失败: {str(e)}",
+                "usage": options["usage"].summary(),
+            }
 
-                raw_content = response.choices[0].message.content
+    # ---------- 流式输出 ----------
 
-                # 3. 添加结果
-                results.append({
-                    "analysis": raw_content,
-                })
+    def stream_compare_documents(
+            self,
+            paths: List[str],
+            prompt_type: str = "contract_version_diff",
+            max_tokens: int = 2000,
+            api_key: Optional[str] = None,
+            base_url: Optional[str] = None,
+            chunked: Optional[bool] = None,
+            use_prefilter: Optional[bool] = None
+    ):
+        """
+        流式文档比对：大模型生成的文本一到达即产出
+        :return: 生成器，依次产出 {"event": "delta", "content"}...，最后为 done 或 error 事件
+        """
+        plan, error = self._compare_plan(paths, prompt_type, self._chunk_options(chunked), use_prefilter)
+        if error:
+            yield {"event": "error", "error": error}
+            return
 
+        content, cached = [], False
+        options = self._call_options('compare', api_key)
+        try:
+            with self.clients.lease(api_key, base_url) as client:
+                for delta, cached in self._stream_plan(client, plan, 0.3, max_tokens, options):
+                    content.append(delta)
+                    yield {"event": "delta", "content": delta}
+        except Exception as e:
+            print(f"文档比对失败: {str(e)}")
+            yield {"event": "error", "error": f"文档比对服务暂时不可用: {str(e)}"}
+            return
+
+        yield {"event": "done", "data": [self._compare_result(plan, "".join(content), cached, options["usage"])]}
+
+    def stream_extract_contract_info(
+            self,
+            paths: List[str],
+            prompt_type: str = "contract_key_info_extractor",
+            max_tokens: int = 2000,
+            api_key: Optional[str] = None,
+            base_url: Optional[str] = None,
+            chunked: Optional[bool] = None
+    ):
+        """
+        流式合同信息提取：多个文件并发生成，分片按到达顺序交错产出，并以 index 标明所属文件
+        :return: 生成器，产出 delta（文本增量）、result（单个文件完成）事件，最后为 done 事件
+        """
+        if prompt_type not in self.prompt_templates:
+            yield {"event": "error", "error": f"未找到提示词模板: {prompt_type}"}
+            return
+
+        options = self._call_options('extract', api_key)
+        chunk = self._chunk_options(chunked)
+        concurrency = max(1, min(len(paths), current_app.config.get('LLM_EXTRACT_CONCURRENCY', 4)))
+        events = queue.Queue()
+        stop = threading.Event()
+        app = current_app._get_current_object()
+
+        def run(idx, path):
+            content, cached = [], False
+            file_options = {**options, "usage": options["usage"].child()}
+            try:
+                with app.app_context():
+                    plan = self._extract_plan(prompt_type, path, chunk)
+                    for delta, cached in self._stream_plan(client, plan, 0.2, max_tokens, file_options, stop):
+                        content.append(delta)
+                        events.put({"event": "delta", "index": idx, "content": delta})
+                result = {"analysis": "".join(content), "cached": cached, "chunks": self._chunk_count(plan)}
             except Exception as e:
                 print(f"[合同解析失败] 文件: {path}, 错误: {str(e)}")
-                results.append({
-                    "file_path": path,
-                    "status": "failed",
-                    "error": f"合同解析失败: {str(e)}"
-                })
+                result = {"file_path": path, "status": "failed", "error": f"合同解析失败: {str(e)}"}
+            result["usage"] = file_options["usage"].summary()
+            events.put({"event": "result", "index": idx, "data": result})
+
+        with ExitStack() as stack:
+            # 响应已经开始，借出失败（如缺少 apiKey）时以 error 事件告知客户端
+            try:
+                client = stack.enter_context(self.clients.lease(api_key, base_url))
+            except Exception as e:
+                print(f"合同解析失败: {str(e)}")
+                yield {"event": "error", "error": f"合同解析服务暂时不可用: {str(e)}"}
+                return
 
-        return results
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='llm-stream')
+            try:
+                for idx, path in enumerate(paths):
+                    executor.submit(run, idx, path)
+                remaining = len(paths)
+                while remaining:
+                    event = events.get()
+                    if event["event"] == "result":
+                        remaining -= 1
+                    yield event
+                yield {"event": "done", "usage": options["usage"].summary()}
+            finally:
+                # 客户端断开时通知各线程停止读取，并等待连接归还后再释放客户端
+                stop.set()
+                executor.shutdown(wait=True, cancel_futures=True)
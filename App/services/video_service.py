@@ -1,4 +1,61 @@
+import os
 import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from flask import current_app, url_for
+
+# 场景检测直方图：色相 16 档 x 饱和度 8 档 x 亮度 4 档
+# 亮度档位不宜过细，否则轻微的曝光变化也会被当作场景切换
+HUE_BINS = 16
+SATURATION_BINS = 8
+VALUE_BINS = 4
+
+
+def color_histogram(frame, width):
+    """缩小到指定宽度后计算归一化的色相-饱和度-亮度直方图（整帧向量化计算）"""
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    # OpenCV 的 8 位色相取值范围为 0-179
+    hue = hsv[..., 0].astype(np.int32) * HUE_BINS // 180
+    saturation = hsv[..., 1].astype(np.int32) * SATURATION_BINS >> 8
+    value = hsv[..., 2].astype(np.int32) * VALUE_BINS >> 8
+    bins = (hue * SATURATION_BINS + saturation) * VALUE_BINS + value
+    return np.bincount(bins.ravel(), minlength=HUE_BINS * SATURATION_BINS * VALUE_BINS) / bins.size
+
+
+def histogram_distance(a, b):
+    """两个归一化直方图的总变差距离，取值 0（相同）到 1（完全不同）"""
+    return float(np.abs(a - b).sum() / 2)
+
+
+def iter_frames_at(capture, fps, times, seek_min_gap):
+    """
+    按时间点读取帧，产出 (时间秒, BGR 帧)
+    相邻采样点间隔较大时直接定位到目标帧，较小时顺序 grab 跳过中间帧（不做颜色转换）
+    """
+    position = 0  # 下一次 read 将得到的帧号
+    for timestamp in times:
+        target = int(round(timestamp * fps))
+        gap = target - position
+        if gap < 0:
+            continue
+        if gap / fps >= seek_min_gap:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+        else:
+            for _ in range(gap):
+                if not capture.grab():
+                    return
+        ok, frame = capture.read()
+        if not ok:
+            return
+        position = target + 1
+        yield target / fps, frame
 
 
 class VideoService(object):
@@ -10,3 +67,104 @@ class VideoService(object):
         return {
             "analysis": "**视频总结**\n\n时长：38.28秒\n\n视频开头是户外场景，背景有一堵绿色植被墙和带阳台的建筑物。前景中有两个人，其中一人穿着格子衬衫，手持带有中文文字的麦克风，另一人穿着蓝色衬衫和牛仔裤。手持麦克风的人似乎正在采访或与穿蓝色衬衫的人交谈。背景中可以看到一些人，有些人撑着伞，暗示天气可能是晴天或者有下雨的可能。\n\n随着视频的推进，这两个主要人物之间的互动仍在继续。穿格子衬衫的人依旧保持着手持麦克风的姿势，而穿蓝色衬衫的人则在回应或给出回答。背景依然保持一致，有绿色植被和建筑物，背景中的人也还在，有些人仍然撑着伞。\n\n在整个视频中，焦点始终集中在两个人之间的持续对话上。麦克风上的中文文字可见，但从画面中无法看清具体内容。这种互动暗示了可能是一场采访或讨论，但从提供的注释中无法得知他们对话的确切内容。\n\n视频结束时，两个人仍然在交谈，他们的位置或背景都没有显著变化。整个视频的基调似乎专注于两个主要人物之间的互动，背景元素则为场景提供了背景信息。\n\n**注**：此总结基于对第一帧的直接观察以及后续帧的详细注释。"
         }
+
+    @staticmethod
+    def _resolve_video_path(file_id):
+        """file_id 可以是文件路径，或相对于 UPLOAD_FOLDER 的路径"""
+        for path in (file_id, os.path.join(current_app.config['UPLOAD_FOLDER'], file_id)):
+            if os.path.isfile(path):
+                return path
+        raise FileNotFoundError(f"视频文件不存在: {file_id}")
+
+    @staticmethod
+    def _select_scenes(samples, width, threshold, min_gap):
+        """从采样帧中挑出场景切换帧：与上一采样帧的直方图距离超过阈值，且距上一关键帧不少于 min_gap 秒"""
+        previous, last_kept = None, None
+        for timestamp, frame in samples:
+            histogram = color_histogram(frame, width)
+            score = 1.0 if previous is None else histogram_distance(histogram, previous)
+            previous = histogram
+            if score >= threshold and (last_kept is None or timestamp - last_kept >= min_gap):
+                last_kept = timestamp
+                yield timestamp, frame, round(score, 4)
+
+    def extract_key_frames(self, file_id, interval=5, mode='interval', threshold=None, max_frames=None):
+        """
+        提取视频关键帧，边提取边写入 OUTPUT_FOLDER/frames/<session_id>
+        - interval：每 interval 秒取一帧，直接定位到采样点而不逐帧解码
+        - scene：按 VIDEO_SCENE_SAMPLE_FPS 采样，缩小后比较颜色直方图，画面变化超过 threshold 时取帧
+        :return: 帧列表 [{index, timestamp, url, (score)}]
+        """
+        config = current_app.config
+        if mode not in ('interval', 'scene'):
+            raise ValueError(f"不支持的提取模式: {mode}")
+        interval = float(interval)
+        if interval <= 0:
+            raise ValueError("interval 必须大于 0")
+        max_frames = int(max_frames or config.get('VIDEO_MAX_FRAMES', 1000))
+
+        path = self._resolve_video_path(file_id)
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise RuntimeError(f"无法打开视频: {file_id}")
+
+        session_id = uuid.uuid4().hex
+        output_dir = os.path.join(config['OUTPUT_FOLDER'], 'frames', session_id)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+            duration = capture.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+            seek_min_gap = config.get('VIDEO_SEEK_MIN_GAP_SECONDS', 2)
+
+            if mode == 'interval':
+                times = np.arange(0, duration, interval)
+                selected = (
+                    (timestamp, frame, None)
+                    for timestamp, frame in iter_frames_at(capture, fps, times, seek_min_gap)
+                )
+            else:
+                step = 1 / config.get('VIDEO_SCENE_SAMPLE_FPS', 2)
+                selected = self._select_scenes(
+                    iter_frames_at(capture, fps, np.arange(0, duration, step), seek_min_gap),
+                    config.get('VIDEO_SCENE_WIDTH', 160),
+                    config.get('VIDEO_SCENE_THRESHOLD', 0.35) if threshold is None else float(threshold),
+                    config.get('VIDEO_SCENE_MIN_GAP_SECONDS', 1.0)
+                )
+
+            return self._write_frames(selected, output_dir, session_id, max_frames)
+        finally:
+            capture.release()
+
+    def _write_frames(self, selected, output_dir, session_id, max_frames):
+        """JPEG 编码与写盘交给后台线程，与解码重叠进行；待写入的帧数有上限"""
+        writers = current_app.config.get('VIDEO_FRAME_WRITERS', 2)
+        params = [cv2.IMWRITE_JPEG_QUALITY, current_app.config.get('VIDEO_FRAME_JPEG_QUALITY', 90)]
+        frames, pending = [], deque()
+
+        def wait_oldest():
+            filename, future = pending.popleft()
+            if not future.result():
+                raise RuntimeError(f"关键帧写入失败: {filename}")
+
+        with ThreadPoolExecutor(max_workers=writers, thread_name_prefix='frame-writer') as executor:
+            for index, (timestamp, frame, score) in enumerate(selected):
+                if index >= max_frames:
+                    break
+                filename = f"frame_{index:05d}_{int(timestamp * 1000)}ms.jpg"
+                pending.append((filename, executor.submit(cv2.imwrite, os.path.join(output_dir, filename), frame, params)))
+                while len(pending) > writers * 2:
+                    wait_oldest()
+
+                item = {
+                    "index": index,
+                    "timestamp": round(timestamp, 3),
+                    "url": url_for('video.get_frame_output', session_id=session_id, filename=filename, _external=True),
+                }
+                if score is not None:
+                    item["score"] = score
+                frames.append(item)
+            while pending:
+                wait_oldest()
+
+        return frames
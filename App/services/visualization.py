@@ -0,0 +1,116 @@
+# services/visualization.py (识别结果可视化)
+import os
+import uuid
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    from paddlex.utils.fonts import PINGFANG_FONT_FILE_PATH as FONT_PATH
+except ImportError:
+    FONT_PATH = None
+
+BOX_COLORS = [(255, 99, 71), (60, 179, 113), (30, 144, 255), (238, 130, 238), (255, 165, 0), (0, 206, 209)]
+
+
+def read_image(path):
+    """读取图片，兼容中文路径"""
+    if not path or not os.path.exists(path):
+        return None
+    data = np.fromfile(path, dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def write_image(path, image):
+    """原子写入 PNG：先写临时文件再替换，避免并发请求读到半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 同一进程内的多个线程可能同时渲染同一张图，临时文件名需各不相同
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    ok, encoded = cv2.imencode('.png', image)
+    if not ok:
+        raise IOError(f"图像编码失败: {path}")
+    try:
+        encoded.tofile(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def blank_canvas(polys, boxes=None):
+    """原图不可用时，按坐标范围生成白色画布"""
+    points = [np.asarray(poly).reshape(-1, 2) for poly in polys]
+    points += [np.asarray(box).reshape(-1, 2) for box in boxes or []]
+    if points:
+        max_x, max_y = np.concatenate(points).max(axis=0)
+    else:
+        max_x, max_y = 640, 480
+    return np.full((int(max_y) + 20, int(max_x) + 20, 3), 255, dtype=np.uint8)
+
+
+def _font(size):
+    if FONT_PATH and os.path.exists(FONT_PATH):
+        return ImageFont.truetype(FONT_PATH, max(8, int(size)))
+    return ImageFont.load_default()
+
+
+def draw_polys(image, polys, alpha=0.4):
+    """在图像上半透明填充并描边多边形"""
+    overlay = image.copy()
+    for idx, poly in enumerate(polys):
+        pts = np.asarray(poly, dtype=np.int32).reshape(-1, 1, 2)
+        cv2.fillPoly(overlay, [pts], BOX_COLORS[idx % len(BOX_COLORS)])
+    result = cv2.addWeighted(overlay, alpha, image, 1 - alpha, 0)
+    for idx, poly in enumerate(polys):
+        pts = np.asarray(poly, dtype=np.int32).reshape(-1, 1, 2)
+        cv2.polylines(result, [pts], True, BOX_COLORS[idx % len(BOX_COLORS)], 2)
+    return result
+
+
+def draw_text_panel(shape, polys, texts):
+    """生成与原图等大的白色面板，在每个文本框位置写出识别文本"""
+    panel = Image.new('RGB', (shape[1], shape[0]), (255, 255, 255))
+    draw = ImageDraw.Draw(panel)
+    for idx, (poly, text) in enumerate(zip(polys, texts)):
+        pts = np.asarray(poly).reshape(-1, 2)
+        x_min, y_min = pts.min(axis=0)
+        x_max, y_max = pts.max(axis=0)
+        draw.polygon([tuple(p) for p in pts.tolist()], outline=BOX_COLORS[idx % len(BOX_COLORS)][::-1])
+        height = max(1, y_max - y_min)
+        width = max(1, x_max - x_min)
+        font_size = min(height * 0.8, width / max(len(text), 1) * 1.2)
+        draw.text((float(x_min) + 2, float(y_min)), text, fill=(0, 0, 0), font=_font(font_size))
+    return cv2.cvtColor(np.asarray(panel), cv2.COLOR_RGB2BGR)
+
+
+def render_ocr(image, page):
+    """OCR 结果：左侧原图叠加文本框，右侧为识别文本"""
+    polys, texts = page.get('polys', []), page.get('texts', [])
+    if image is None:
+        image = blank_canvas(polys)
+    return np.hstack([draw_polys(image, polys), draw_text_panel(image.shape, polys, texts)])
+
+
+def render_table(image, page):
+    """表格结果：单元格框与文本框叠加在原图上"""
+    cells = [cell for table in page.get('tables', []) for cell in table.get('cells', [])]
+    polys = page.get('polys', [])
+    if image is None:
+        image = blank_canvas(polys, cells)
+    result = draw_polys(image, polys, alpha=0.2)
+    for x1, y1, x2, y2 in (np.asarray(cell).reshape(-1)[:4] for cell in cells):
+        cv2.rectangle(result, (int(x1), int(y1)), (int(x2), int(y2)), (0, 160, 0), 2)
+    return result
+
+
+def render_seal(image, page):
+    """印章结果：与 OCR 相同的左右对照布局"""
+    return render_ocr(image, page)
+
+
+RENDERERS = {
+    'ocr': render_ocr,
+    'table': render_table,
+    'seal': render_seal,
+}
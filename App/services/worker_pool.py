@@ -0,0 +1,260 @@
+# services/worker_pool.py (多进程推理工作池)
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from flask import has_request_context, request
+
+
+# 检查工作进程存活的最小间隔（秒）
+LIVENESS_CHECK_INTERVAL = 1
+
+
+class WorkerPoolBusy(RuntimeError):
+    """推理队列已满，调用方应稍后重试"""
+
+
+class InferenceWorkerPool:
+    """
+    多进程推理工作池
+    - N 个工作进程各自持有独立的 ImageService / AudioService 与模型
+    - Web 进程通过有界队列分发任务，队列满时立即抛出 WorkerPoolBusy
+    - 未启用（INFERENCE_WORKERS = 0）时在当前线程直接执行
+    """
+
+    def __init__(self):
+        self.num_workers = 0
+        self.queue_size = 0
+        self.task_timeout = None
+        self._owner_pid = None
+        self._ctx = None
+        self._task_queue = None
+        self._result_queue = None
+        self._slots = None
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._workers = {}
+        self._worker_status = {}
+        # 工作进程 -> 正在执行的任务 ID
+        self._worker_tasks = {}
+        self._collector = None
+        self._stopping = False
+
+    def init_app(self, app):
+        """按配置启动工作进程"""
+        num_workers = app.config.get('INFERENCE_WORKERS', 0)
+        if num_workers <= 0:
+            return
+        self.start(
+            num_workers,
+            queue_size=app.config.get('INFERENCE_QUEUE_SIZE', 16),
+            task_timeout=app.config.get('INFERENCE_TASK_TIMEOUT', 600)
+        )
+        app.logger_custom.info(f"推理进程池已启动，工作进程数: {num_workers}")
+
+    def start(self, num_workers, queue_size=16, task_timeout=600):
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.task_timeout = task_timeout
+        self._owner_pid = os.getpid()
+        self._ctx = multiprocessing.get_context()
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        # 运行中 + 排队中的任务总数上限
+        self._slots = threading.BoundedSemaphore(num_workers + queue_size)
+
+        for worker_id in range(num_workers):
+            self._spawn_worker(worker_id)
+
+        self._collector = threading.Thread(target=self._collect_results, name='inference-collector', daemon=True)
+        self._collector.start()
+
+    def _spawn_worker(self, worker_id):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.num_workers, self._task_queue, self._result_queue),
+            name=f'inference-worker-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = process
+        self._worker_tasks.pop(worker_id, None)
+        self._worker_status[worker_id] = {'state': 'starting', 'pid': process.pid}
+
+    @property
+    def running(self):
+        # fork 出的子进程会继承该对象，只有创建进程池的进程才视为运行中
+        return self._owner_pid == os.getpid() and not self._stopping
+
+    def is_ready(self):
+        return self.running and all(
+            status.get('state') == 'ready' for status in self._worker_status.values()
+        )
+
+    def status(self):
+        return {
+            'workers': {worker_id: dict(status) for worker_id, status in self._worker_status.items()},
+            'in_flight': len(self._pending),
+            'capacity': self.num_workers + self.queue_size,
+        }
+
+    def submit(self, service_name, method_name, args=(), kwargs=None, base_url=None):
+        """
+        投递任务到工作进程
+        :return: Future，结果为服务方法的返回值
+        :raises WorkerPoolBusy: 队列已满
+        """
+        if not self._slots.acquire(blocking=False):
+            raise WorkerPoolBusy("推理队列已满，请稍后重试")
+
+        task_id = next(self._task_ids)
+        future = Future()
+        future.task_id = task_id
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._pending_lock:
+            self._pending[task_id] = future
+        self._task_queue.put((task_id, service_name, method_name, args, kwargs or {}, base_url))
+        return future
+
+    def run(self, method, *args, **kwargs):
+        """
+        执行服务方法：启用进程池时分发给工作进程并等待结果，否则直接调用
+        :param method: 服务实例的绑定方法，如 image_service.process_ocr
+        """
+        if not self.running:
+            return method(*args, **kwargs)
+
+        base_url = request.host_url if has_request_context() else None
+        future = self.submit(type(method.__self__).__name__, method.__name__, args, kwargs, base_url)
+        try:
+            return future.result(timeout=self.task_timeout)
+        except FutureTimeoutError:
+            # 只放弃等待：工作进程仍在执行该任务，名额保留到迟到的结果返回（结果丢弃）或进程退出时再释放
+            raise TimeoutError(f"推理任务超时（{self.task_timeout}s）")
+
+    def _collect_results(self):
+        """后台线程：接收工作进程的结果与状态消息，并拉起异常退出的工作进程"""
+        last_check = time.monotonic()
+        while not self._stopping:
+            try:
+                self._handle_message(self._result_queue.get(timeout=LIVENESS_CHECK_INTERVAL))
+            except queue.Empty:
+                pass
+            # 结果持续到达时 get 不会超时，存活检查按时间间隔进行
+            if time.monotonic() - last_check >= LIVENESS_CHECK_INTERVAL:
+                last_check = time.monotonic()
+                self._respawn_dead_workers()
+
+    def _handle_message(self, message):
+        kind = message[0]
+        if kind == 'ready':
+            _, worker_id, models = message
+            self._worker_status[worker_id].update(state='ready', models=models)
+        elif kind == 'start':
+            _, worker_id, task_id = message
+            self._worker_tasks[worker_id] = task_id
+        elif kind == 'result':
+            _, worker_id, task_id, ok, payload = message
+            if self._worker_tasks.get(worker_id) == task_id:
+                del self._worker_tasks[worker_id]
+            if ok:
+                self._finish(task_id, result=payload)
+            else:
+                self._finish(task_id, exception=payload)
+
+    def _finish(self, task_id, result=None, exception=None):
+        """完成任务的 Future（调用方已超时放弃时结果被丢弃），并释放其名额"""
+        with self._pending_lock:
+            future = self._pending.pop(task_id, None)
+        if future is None:
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _respawn_dead_workers(self):
+        dead = [
+            (worker_id, process) for worker_id, process in self._workers.items()
+            if not process.is_alive()
+        ]
+        if not dead or self._stopping:
+            return
+        # 进程退出前可能已发出结果，先处理队列中已到达的消息
+        while True:
+            try:
+                self._handle_message(self._result_queue.get_nowait())
+            except queue.Empty:
+                break
+        for worker_id, process in dead:
+            task_id = self._worker_tasks.pop(worker_id, None)
+            if task_id is not None:
+                # 立即让等待方失败，不必等到任务超时
+                self._finish(task_id, exception=RuntimeError(
+                    f"推理工作进程 {worker_id} 异常退出（退出码 {process.exitcode}）"
+                ))
+            self._spawn_worker(worker_id)
+
+    def shutdown(self):
+        if not self.running:
+            return
+        self._stopping = True
+        for _ in self._workers:
+            self._task_queue.put(None)
+        for process in self._workers.values():
+            process.join(timeout=5)
+
+
+def _picklable_exception(exc):
+    """异常需跨进程传回，无法序列化时退化为 RuntimeError"""
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(str(exc))
+
+
+def _worker_main(worker_id, num_workers, task_queue, result_queue):
+    """工作进程入口：创建应用、预热模型，然后循环执行任务"""
+    from App import create_app
+    from App.routes import image_service, audio_service
+    from App.services.model_registry import model_registry
+
+    app = create_app(inference_worker=True)
+    # 多个工作进程平分 CPU 核心，避免算子线程互相抢占
+    if not app.config.get('INFERENCE_CPU_THREADS'):
+        app.config['INFERENCE_CPU_THREADS'] = max(1, (os.cpu_count() or 1) // num_workers)
+
+    model_registry.preload(app)
+    result_queue.put(('ready', worker_id, model_registry.status()))
+
+    services = {type(service).__name__: service for service in (image_service, audio_service)}
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, service_name, method_name, args, kwargs, base_url = task
+        result_queue.put(('start', worker_id, task_id))
+        try:
+            method = getattr(services[service_name], method_name)
+            # url_for(_external=True) 需要请求上下文，使用原请求的 host 构造
+            if base_url:
+                with app.test_request_context('/', base_url=base_url):
+                    result = method(*args, **kwargs)
+            else:
+                with app.app_context():
+                    result = method(*args, **kwargs)
+            result_queue.put(('result', worker_id, task_id, True, result))
+        except Exception as e:
+            result_queue.put(('result', worker_id, task_id, False, _picklable_exception(e)))
+
+
+worker_pool = InferenceWorkerPool()
@@ -1,12 +1,17 @@
 # app/utils.py
 
 import os
+import sys
 import uuid
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from flask import current_app
+from io import BytesIO
+from flask import current_app, Request
 from werkzeug.utils import secure_filename
 
 IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png'}
+DECODABLE_IMAGE_EXTENSIONS = IMAGE_EXTENSIONS | {'bmp'}
 
 
 def create_upload_dir(app):
@@ -25,14 +30,15 @@ def is_allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
-def save_uploaded_file(file, session_id):
-    if file.filename == '':
+def _build_upload_path(original_filename, session_id):
+    """校验文件名并生成上传保存路径：UPLOAD_FOLDER/日期/会话ID/文件名"""
+    if original_filename == '':
         raise ValueError("空文件名")
 
-    if not is_allowed_file(file.filename, current_app.config['ALLOWED_EXTENSIONS']):
-        raise ValueError(f"文件类型不支持: {file.filename}")
+    if not is_allowed_file(original_filename, current_app.config['ALLOWED_EXTENSIONS']):
+        raise ValueError(f"文件类型不支持: {original_filename}")
 
-    ext = file.filename.rsplit('.', 1)[-1].lower()
+    ext = original_filename.rsplit('.', 1)[-1].lower()
     if not ext:
         raise ValueError("无效扩展名")
 
@@ -45,9 +51,13 @@ def save_uploaded_file(file, session_id):
     if ext in IMAGE_EXTENSIONS:
         filename = f"{uuid.uuid4().hex}.{ext}"
     else:
-        filename = secure_filename(file.filename)
+        filename = secure_filename(original_filename)
+
+    return os.path.join(base_path, filename)
 
-    save_path = os.path.join(base_path, filename)
+
+def save_uploaded_file(file, session_id):
+    save_path = _build_upload_path(file.filename, session_id)
 
     try:
         with open(save_path, 'wb') as f:
@@ -60,6 +70,102 @@ def save_uploaded_file(file, session_id):
     return os.path.abspath(save_path)
 
 
+def save_uploaded_bytes(filename, data, session_id):
+    """保存已读入内存的上传内容（识别已在内存中完成，无需 fsync 阻塞请求）"""
+    save_path = _build_upload_path(filename, session_id)
+
+    try:
+        with open(save_path, 'wb') as f:
+            f.write(data)
+    except Exception as e:
+        raise IOError(f"文件保存失败: {str(e)}")
+
+    return os.path.abspath(save_path)
+
+
+class InMemoryUploadRequest(Request):
+    """
+    上传内容不超过 IN_MEMORY_UPLOAD_MAX_BYTES 时直接解析到内存，
+    避免 werkzeug 默认把较大的文件先落到临时文件
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        limit = current_app.config.get('IN_MEMORY_UPLOAD_MAX_BYTES', 0)
+        if total_content_length is not None and total_content_length <= limit:
+            return BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def get_memory_usage_mb():
+    """当前进程常驻内存（MB），平台不支持时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # 退化为峰值内存：macOS 上单位为字节，其余平台为 KB
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class LRUCache:
+    """线程安全的内存 LRU 缓存，可按条目数或按自定义大小（如字节数）限制容量"""
+
+    def __init__(self, max_size=128, size_fn=None):
+        self.max_size = max_size
+        self.size_fn = size_fn or (lambda value: 1)
+        self.current_size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def set(self, key, value):
+        size = self.size_fn(value)
+        with self._lock:
+            if key in self._data:
+                self.current_size -= self._data.pop(key)[1]
+            # 单个条目超过总容量时不缓存
+            if size > self.max_size:
+                return
+            self._data[key] = (value, size)
+            self.current_size += size
+            while self.current_size > self.max_size:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_size -= evicted_size
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, size = self._data.pop(key)
+            self.current_size -= size
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_size = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
 class Logger:
     def __init__(self, name="APP", enable_file=False, log_dir="logs"):
         self.name = name
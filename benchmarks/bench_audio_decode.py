@@ -0,0 +1,109 @@
+# benchmarks/bench_audio_decode.py
+"""
+整段解码（pydub）与 ffmpeg 流式解码的耗时、峰值内存对比，以及分块大小的影响
+
+每个配置在独立子进程中运行，避免内存统计互相干扰。
+默认只解码并逐块遍历（不识别），加 --recognize 时送入 Vosk 识别器并给出实时率（RTF）。
+
+用法:
+    python -m benchmarks.bench_audio_decode <音频文件> [--chunks 4000,8000,16000,32000] [--recognize]
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+
+
+def _consume_pydub(path, sample_rate, chunk_bytes, recognizer):
+    """原实现：整段解码到内存，再按切片逐块送入"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(path).set_channels(1).set_frame_rate(sample_rate)
+    raw_audio = audio.raw_data
+    for i in range(0, len(raw_audio), chunk_bytes):
+        chunk = raw_audio[i:i + chunk_bytes]
+        if recognizer is not None:
+            recognizer.AcceptWaveform(chunk)
+    return len(raw_audio)
+
+
+def _consume_stream(path, sample_rate, chunk_bytes, recognizer):
+    from App.services.audio_decode import iter_pcm_blocks
+
+    total = 0
+    for block in iter_pcm_blocks(path, sample_rate=sample_rate, block_bytes=chunk_bytes):
+        total += len(block)
+        if recognizer is not None:
+            recognizer.AcceptWaveform(block)
+    return total
+
+
+def run_config(path, mode, chunk_bytes, recognize, result_queue):
+    from App import create_app
+    from App.services.audio_service import AudioService
+    from App.utils import get_memory_usage_mb
+
+    app = create_app()
+    service = AudioService()
+    with app.app_context():
+        recognizer = None
+        if recognize:
+            from vosk import KaldiRecognizer
+            recognizer = KaldiRecognizer(service.load_model(), service.sample_rate)
+
+        baseline = get_memory_usage_mb() or 0.0
+        # 后台采样常驻内存，取解码期间的峰值
+        peak = [baseline]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.is_set():
+                peak[0] = max(peak[0], get_memory_usage_mb() or 0.0)
+                time.sleep(0.02)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        consume = _consume_pydub if mode == 'pydub' else _consume_stream
+        start = time.perf_counter()
+        total = consume(path, service.sample_rate, chunk_bytes, recognizer)
+        if recognizer is not None:
+            recognizer.FinalResult()
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        sampler.join()
+
+    result_queue.put({
+        'elapsed': elapsed,
+        'duration': total / (service.sample_rate * 2),
+        'peak_mb': peak[0] - baseline,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频解码方式与分块大小基准测试")
+    parser.add_argument('path')
+    parser.add_argument('--chunks', default='4000,8000,16000,32000')
+    parser.add_argument('--recognize', action='store_true', help="同时执行语音识别")
+    args = parser.parse_args()
+
+    chunk_sizes = [int(size) for size in args.chunks.split(',')]
+    configs = [('pydub', 4000)] + [('stream', size) for size in chunk_sizes]
+
+    ctx = multiprocessing.get_context('spawn')
+    print(f"{'方式':>8} | {'分块字节':>8} | {'音频时长':>8} | {'耗时':>8} | {'RTF':>6} | {'峰值内存增量':>12}")
+    for mode, chunk_bytes in configs:
+        result_queue = ctx.Queue()
+        process = ctx.Process(target=run_config, args=(args.path, mode, chunk_bytes, args.recognize, result_queue))
+        process.start()
+        report = result_queue.get()
+        process.join()
+
+        rtf = report['elapsed'] / report['duration'] if report['duration'] else 0.0
+        print(f"{mode:>8} | {chunk_bytes:>8} | {report['duration']:>7.0f}s | {report['elapsed']:>7.2f}s | "
+              f"{rtf:>6.3f} | {report['peak_mb']:>10.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_audio_tiers.py
+"""
+各语音识别档位（AUDIO_MODEL_TIERS）的加载耗时、常驻内存、实时率（RTF）与准确率
+
+每个档位在独立子进程中运行，避免模型与内存统计互相干扰。
+默认关闭静音切分、单线程识别，RTF 反映单核速度；加 --parallel 时使用服务默认配置。
+准确率：音频旁存在同名 .txt 时与其比对，否则与第一个档位的结果比对（字符级相似度）。
+
+用法:
+    python -m benchmarks.bench_audio_tiers <音频目录> [--tiers fast,accurate] [--parallel]
+"""
+import argparse
+import difflib
+import multiprocessing
+import os
+import statistics
+import time
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg', '.opus', '.webm')
+
+
+def collect_audio(audio_dir):
+    return sorted(
+        os.path.join(audio_dir, name) for name in os.listdir(audio_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+
+
+def audio_seconds(path, sample_rate):
+    from App.services.audio_decode import iter_pcm_blocks
+
+    return sum(len(block) for block in iter_pcm_blocks(path, sample_rate=sample_rate, block_bytes=1 << 16)) / (
+        sample_rate * 2
+    )
+
+
+def run_tier(audio_dir, tier, parallel, result_queue):
+    from App import create_app
+    from App.services.audio_service import AudioService
+
+    app = create_app()
+    if not parallel:
+        app.config['AUDIO_VAD_SEGMENTATION'] = False
+        app.config['AUDIO_RECOGNIZE_CONCURRENCY'] = 1
+    service = AudioService()
+    paths = collect_audio(audio_dir)
+
+    with app.app_context():
+        service.load_model(tier)
+        status = service.model_status()[tier]
+
+        durations, elapsed, texts = [], [], []
+        for path in paths:
+            durations.append(audio_seconds(path, service.sample_rate))
+            start = time.perf_counter()
+            texts.append(service.recognize_speech([path], tier)[0]['text'])
+            elapsed.append(time.perf_counter() - start)
+
+    result_queue.put({
+        'load_seconds': status.get('load_seconds'),
+        'memory_mb': status.get('memory_mb'),
+        'rtf': sum(elapsed) / sum(durations) if sum(durations) else 0.0,
+        'texts': texts,
+    })
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio() if a or b else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音识别档位基准测试")
+    parser.add_argument('audio_dir')
+    parser.add_argument('--tiers', default='fast,accurate')
+    parser.add_argument('--parallel', action='store_true', help="启用静音切分与并行识别")
+    args = parser.parse_args()
+
+    paths = collect_audio(args.audio_dir)
+    if not paths:
+        raise SystemExit(f"目录中没有音频: {args.audio_dir}")
+
+    references = []
+    for path in paths:
+        truth = os.path.splitext(path)[0] + '.txt'
+        references.append(open(truth, encoding='utf-8').read() if os.path.exists(truth) else None)
+
+    ctx = multiprocessing.get_context('spawn')
+    baseline_texts = None
+    print(f"{'档位':>10} | {'加载耗时':>8} | {'内存':>8} | {'RTF':>6} | {'准确率':>8}")
+    for tier in args.tiers.split(','):
+        result_queue = ctx.Queue()
+        process = ctx.Process(target=run_tier, args=(args.audio_dir, tier, args.parallel, result_queue))
+        process.start()
+        report = result_queue.get()
+        process.join()
+
+        if baseline_texts is None:
+            baseline_texts = report['texts']
+        accuracy = statistics.mean(
+            similarity((reference if reference is not None else expected).replace('\n', ''), text.replace('\n', ''))
+            for reference, expected, text in zip(references, baseline_texts, report['texts'])
+        )
+        print(f"{tier:>10} | {report['load_seconds'] or 0:>7.1f}s | {report['memory_mb'] or 0:>6.0f}MB | "
+              f"{report['rtf']:>6.3f} | {accuracy:>8.2%}")
+
+
+if __name__ == '__main__':
+    main()
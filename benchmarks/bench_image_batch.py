@@ -0,0 +1,68 @@
+# benchmarks/bench_image_batch.py
+"""
+图像管道批处理吞吐量对比：逐文件推理 vs 批量推理
+
+用法:
+    python -m benchmarks.bench_image_batch <图片目录> [--batch-size 8] [--pipelines ocr,table,seal,doc]
+"""
+import argparse
+import os
+import time
+
+from App import create_app
+from App.services.image_service import ImageService
+from App.utils import IMAGE_EXTENSIONS
+
+PIPELINE_METHODS = {
+    'ocr': 'process_ocr',
+    'table': 'process_table_recognise',
+    'seal': 'process_seal_recognise',
+    'doc': 'process_doc',
+}
+
+
+def collect_images(folder):
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS
+    )
+
+
+def measure(method, paths, batch_size):
+    start = time.perf_counter()
+    method(paths, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return len(paths) / elapsed if elapsed else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图像管道批处理吞吐量对比")
+    parser.add_argument('image_dir', help="测试图片所在目录")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--pipelines', default='ocr,table,seal,doc')
+    args = parser.parse_args()
+
+    paths = collect_images(args.image_dir)
+    if not paths:
+        raise SystemExit(f"目录中没有图片: {args.image_dir}")
+
+    app = create_app()
+    # 关闭结果缓存，否则批量推理的一轮全部命中逐文件推理写入的缓存
+    app.config['RESULT_CACHE_ENABLED'] = False
+    app.config['IMAGE_BATCH_SIZE'] = args.batch_size
+    service = ImageService()
+
+    with app.test_request_context():
+        for name in args.pipelines.split(','):
+            method = getattr(service, PIPELINE_METHODS[name])
+            # 预热：首次调用包含模型加载，不计入统计
+            method(paths[:1], batch_size=1)
+
+            per_file = measure(method, paths, 1)
+            batched = measure(method, paths, args.batch_size)
+            print(f"[{name}] 图片数 {len(paths)} | 逐文件 {per_file:.2f} img/s | "
+                  f"批量(batch={args.batch_size}) {batched:.2f} img/s | 加速比 {batched / per_file:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_image_downscale.py
+"""
+输入缩放上限对 OCR 延迟、峰值内存与准确率的影响
+
+每个缩放上限在独立子进程中运行，避免模型与内存统计互相干扰。
+准确率：图片旁存在同名 .txt 时与其比对，否则与不缩放的结果比对（字符级相似度）。
+
+用法:
+    python -m benchmarks.bench_image_downscale <图片目录> [--sides none,1600,2048,2560] [--pipeline ocr]
+"""
+import argparse
+import difflib
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.bench_image_batch import collect_images, PIPELINE_METHODS
+
+
+def run_config(image_dir, pipeline, max_side, result_queue):
+    from App import create_app
+    from App.services.image_service import ImageService
+    from App.utils import get_memory_usage_mb
+
+    app = create_app()
+    app.config['RESULT_CACHE_ENABLED'] = False
+    app.config['IMAGE_MAX_SIDE'] = {**app.config['IMAGE_MAX_SIDE'], pipeline: max_side}
+    service = ImageService()
+    method = getattr(service, PIPELINE_METHODS[pipeline])
+    paths = collect_images(image_dir)
+
+    with app.test_request_context():
+        service.warmup_pipeline(pipeline)
+        baseline = get_memory_usage_mb() or 0.0
+
+        # 后台采样常驻内存，取推理期间的峰值
+        peak = [baseline]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.is_set():
+                peak[0] = max(peak[0], get_memory_usage_mb() or 0.0)
+                time.sleep(0.02)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        latencies, texts = [], []
+        for path in paths:
+            start = time.perf_counter()
+            result = method([path], batch_size=1)[0]
+            latencies.append(time.perf_counter() - start)
+            texts.append(result.get('text', ''))
+
+        stop.set()
+        sampler.join()
+
+    result_queue.put({
+        'latencies': latencies,
+        'texts': texts,
+        'peak_mb': peak[0] - baseline,
+    })
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio() if a or b else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="输入缩放上限基准测试")
+    parser.add_argument('image_dir')
+    parser.add_argument('--sides', default='none,1600,2048,2560')
+    parser.add_argument('--pipeline', default='ocr', choices=['ocr', 'table', 'seal'])
+    args = parser.parse_args()
+
+    paths = collect_images(args.image_dir)
+    if not paths:
+        raise SystemExit(f"目录中没有图片: {args.image_dir}")
+
+    references = []
+    for path in paths:
+        truth = os.path.splitext(path)[0] + '.txt'
+        references.append(open(truth, encoding='utf-8').read() if os.path.exists(truth) else None)
+
+    ctx = multiprocessing.get_context('spawn')
+    baseline_texts = None
+    print(f"{'最长边':>8} | {'平均延迟':>10} | {'P95 延迟':>10} | {'推理峰值内存':>12} | {'准确率':>8}")
+    for side in args.sides.split(','):
+        max_side = None if side == 'none' else int(side)
+        result_queue = ctx.Queue()
+        process = ctx.Process(target=run_config, args=(args.image_dir, args.pipeline, max_side, result_queue))
+        process.start()
+        report = result_queue.get()
+        process.join()
+
+        if baseline_texts is None:
+            baseline_texts = report['texts']
+        accuracy = statistics.mean(
+            similarity(reference if reference is not None else expected, text)
+            for reference, expected, text in zip(references, baseline_texts, report['texts'])
+        )
+        latencies = sorted(report['latencies'])
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{side:>8} | {statistics.mean(latencies) * 1000:>8.0f}ms | {p95 * 1000:>8.0f}ms | "
+              f"{report['peak_mb']:>10.0f}MB | {accuracy:>8.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_text_load.py
+"""
+/text 接口压测：按设定并发持续发送 compare / extract 请求，统计延迟分位数、吞吐量与错误率
+
+先启动大模型替身服务与后端，再运行压测:
+    python -m benchmarks.llm_stub_server --latency 0.5 --token-rate 80
+    python run.py
+    python -m benchmarks.bench_text_load --endpoint extract --paths a.pdf b.pdf \
+        --concurrency 8 --requests 200 --llm-url http://127.0.0.1:8901 [--stream]
+
+说明：相同文件的重复请求会命中大模型响应缓存，测量未缓存路径时请在配置中关闭 LLM_CACHE_ENABLED
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def send(url, body, stream, timeout):
+    """发送一次请求，返回 (是否成功, 总耗时, 首字节耗时, 状态)"""
+    data = json.dumps(body).encode('utf-8')
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            first = response.read(1)
+            ttfb = time.perf_counter() - start
+            rest = response.read()
+            elapsed = time.perf_counter() - start
+            payload = first + rest
+    except urllib.error.HTTPError as e:
+        return False, time.perf_counter() - start, None, str(e.code)
+    except Exception as e:
+        return False, time.perf_counter() - start, None, type(e).__name__
+
+    if stream:
+        ok = b'"event": "error"' not in payload and b'"status": "failed"' not in payload
+    else:
+        try:
+            result = json.loads(payload)
+            ok = result.get('status') == 'success' and 'error' not in json.dumps(result.get('data'))
+        except ValueError:
+            ok = False
+    return ok, elapsed, ttfb, 'ok' if ok else 'failed'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/text 接口压测")
+    parser.add_argument('--server', default='http://127.0.0.1:5600', help="后端地址")
+    parser.add_argument('--endpoint', choices=['compare', 'extract'], default='extract')
+    parser.add_argument('--paths', nargs='+', required=True, help="服务器上可访问的文件路径")
+    parser.add_argument('--llm-url', default='http://127.0.0.1:8901', help="大模型接口地址（替身服务）")
+    parser.add_argument('--api-key', default='sk-stub')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--stream', action='store_true', help="使用流式接口，额外统计首字节耗时")
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    url = f"{args.server.rstrip('/')}/text/{args.endpoint}"
+    body = {"paths": args.paths, "apiKey": args.api_key, "baseUrl": args.llm_url}
+    if args.stream:
+        body["stream"] = "ndjson"
+
+    results, lock = [], threading.Lock()
+
+    def worker(_):
+        outcome = send(url, body, args.stream, args.timeout)
+        with lock:
+            results.append(outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(worker, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies = [elapsed for ok, elapsed, _, _ in results if ok]
+    ttfbs = [ttfb for ok, _, ttfb, _ in results if ok and ttfb is not None]
+    errors = {}
+    for ok, _, _, status in results:
+        if not ok:
+            errors[status] = errors.get(status, 0) + 1
+
+    print(f"接口 /text/{args.endpoint} | 并发 {args.concurrency} | 请求 {len(results)} | 耗时 {wall:.2f}s")
+    print(f"吞吐量 {len(results) / wall:.2f} req/s | 错误率 {(len(results) - len(latencies)) / len(results):.2%} {errors or ''}")
+    if latencies:
+        print(f"延迟 p50 {percentile(latencies, 50) * 1000:.0f} ms | p95 {percentile(latencies, 95) * 1000:.0f} ms | "
+              f"p99 {percentile(latencies, 99) * 1000:.0f} ms | 平均 {statistics.mean(latencies) * 1000:.0f} ms")
+    if args.stream and ttfbs:
+        print(f"首字节 p50 {percentile(ttfbs, 50) * 1000:.0f} ms | p95 {percentile(ttfbs, 95) * 1000:.0f} ms | "
+              f"p99 {percentile(ttfbs, 99) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/check_seal_overlay.py
+"""
+印章可视化回归检查：按需渲染的叠加图与 PaddleX 管道自身 save_to_img 的输出比对
+
+对每个印章区域，分别取两张图中该区域内被文本框着色的像素（与原图差异明显的像素），
+计算重合度（IoU）；印章文本框坐标未平移回整页时，叠加图在该区域内几乎没有着色，IoU 接近 0。
+
+用法:
+    python -m benchmarks.check_seal_overlay <图片目录> [--min-iou 0.5]
+"""
+import argparse
+import glob
+import os
+import re
+import tempfile
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_image_batch import collect_images
+
+# 与原图的三通道差值之和超过该值时视为被着色
+DIFF_THRESHOLD = 30
+
+
+def painted_mask(image, plain):
+    return np.abs(image.astype(np.int32) - plain.astype(np.int32)).sum(axis=2) > DIFF_THRESHOLD
+
+
+def iou(a, b):
+    union = np.logical_or(a, b).sum()
+    return float(np.logical_and(a, b).sum() / union) if union else 1.0
+
+
+def pipeline_regions(res, output_dir):
+    """管道保存的各印章区域图（左半为叠加了文本框的裁剪图），按区域编号排序"""
+    res.save_to_img(output_dir)
+    regions = {}
+    for path in glob.glob(os.path.join(output_dir, '*seal_res_region*.png')):
+        match = re.search(r'seal_res_region(\d+)', os.path.basename(path))
+        if match:
+            regions[int(match.group(1))] = cv2.imread(path)
+    return [regions[key] for key in sorted(regions)]
+
+
+def check_image(service, pipeline, path, min_iou):
+    from App.services.visualization import RENDERERS
+
+    res = next(iter(pipeline.predict(input=path, **service.PIPELINES['seal'][3])))
+    page_image = res['doc_preprocessor_res']['output_img']
+    page = service._extract_seal_page(res, None, 0)
+    overlay = RENDERERS['seal'](page_image, page)[:, :page_image.shape[1]]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        expected = pipeline_regions(res, output_dir)
+    offsets = service._seal_offsets(res)
+    if len(expected) != len(offsets):
+        print(f"{os.path.basename(path)}: 管道输出 {len(expected)} 个印章区域，结构化结果 {len(offsets)} 个")
+        return False
+
+    passed = True
+    for region, ((x, y), reference) in enumerate(zip(offsets, expected), start=1):
+        # 区域图为裁剪图与文本面板左右拼接，左半即裁剪区域
+        crop_h, crop_w = reference.shape[0], reference.shape[1] // 2
+        plain = page_image[y:y + crop_h, x:x + crop_w]
+        reference = reference[:plain.shape[0], :plain.shape[1]]
+        score = iou(painted_mask(overlay[y:y + crop_h, x:x + crop_w], plain), painted_mask(reference, plain))
+        ok = score >= min_iou
+        passed = passed and ok
+        print(f"{os.path.basename(path)} 印章 {region}: IoU {score:.2f} {'通过' if ok else '失败'}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="印章可视化回归检查")
+    parser.add_argument('image_dir', help="含印章的测试图片所在目录")
+    parser.add_argument('--min-iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    from App import create_app
+    from App.services.image_service import ImageService
+
+    paths = collect_images(args.image_dir)
+    if not paths:
+        raise SystemExit(f"目录中没有图片: {args.image_dir}")
+
+    app = create_app()
+    service = ImageService()
+    with app.app_context():
+        pipeline = service.ensure_pipeline('seal')
+        results = [check_image(service, pipeline, path, args.min_iou) for path in paths]
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# benchmarks/llm_stub_server.py
+"""
+本地 OpenAI 兼容的大模型替身服务，用于在无网络环境下压测 /text 接口
+
+支持 POST /chat/completions 与 /v1/chat/completions，普通与流式（SSE）两种响应，
+可配置首 token 延迟、生成速度、响应长度与错误注入。
+
+用法:
+    python -m benchmarks.llm_stub_server [--port 8901] [--latency 0.5] [--token-rate 50]
+                                         [--tokens 300] [--error-rate 0.05] [--error-status 429]
+
+压测时把请求中的 baseUrl 指向 http://127.0.0.1:8901 即可
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = "根据合同条款分析，本条约定的付款期限与违约责任存在调整，建议双方协商确认。"
+
+
+class StubState:
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+
+def _tokens(count):
+    """生成 count 个“token”（每个 token 为一个汉字）"""
+    return [FILLER[i % len(FILLER)] for i in range(count)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def log_message(self, format, *args):
+        if self.state.args.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('/models', '/v1/models'):
+            self._send_json(200, {"object": "list", "data": [{"id": "deepseek-chat", "object": "model"}]})
+        elif self.path == '/stats':
+            with self.state.lock:
+                self._send_json(200, {"requests": self.state.requests, "errors": self.state.errors})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+        if self.path.rstrip('/') not in ('/chat/completions', '/v1/chat/completions'):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        args = self.state.args
+        with self.state.lock:
+            self.state.requests += 1
+            inject_error = random.random() < args.error_rate
+            if inject_error:
+                self.state.errors += 1
+
+        if inject_error:
+            time.sleep(args.latency * random.random())
+            headers = {'Retry-After': str(args.retry_after)} if args.error_status == 429 else None
+            self._send_json(args.error_status, {"error": {"message": "injected error", "type": "stub"}}, headers)
+            return
+
+        prompt_chars = sum(len(str(message.get('content', ''))) for message in request.get('messages', []))
+        completion = min(args.tokens, request.get('max_tokens') or args.tokens)
+        usage = {
+            "prompt_tokens": prompt_chars,
+            "completion_tokens": completion,
+            "total_tokens": prompt_chars + completion,
+        }
+        # 首 token 延迟带 ±20% 抖动
+        time.sleep(args.latency * random.uniform(0.8, 1.2))
+
+        if request.get('stream'):
+            self._stream(request, completion, usage)
+        else:
+            time.sleep(completion / args.token_rate)
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get('model', 'deepseek-chat'),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(_tokens(completion))},
+                    "finish_reason": "length" if completion == request.get('max_tokens') else "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _stream(self, request, completion, usage):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get('model', 'deepseek-chat')
+
+        def send(delta=None, finish_reason=None, extra=None):
+            payload = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [] if delta is None and finish_reason is None else [
+                    {"index": 0, "delta": delta or {}, "finish_reason": finish_reason}
+                ],
+                **(extra or {}),
+            }
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        interval = 1 / self.state.args.token_rate
+        try:
+            send({"role": "assistant", "content": ""})
+            for token in _tokens(completion):
+                send({"content": token})
+                time.sleep(interval)
+            send(finish_reason="stop")
+            if (request.get('stream_options') or {}).get('include_usage'):
+                send(extra={"usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前断开
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容的大模型替身服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency', type=float, default=0.5, help="首 token 延迟（秒）")
+    parser.add_argument('--token-rate', type=float, default=50, help="生成速度（token/秒）")
+    parser.add_argument('--tokens', type=int, default=300, help="每次响应的 token 数（不超过 max_tokens）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="注入错误的请求比例")
+    parser.add_argument('--error-status', type=int, default=429, help="注入错误的 HTTP 状态码")
+    parser.add_argument('--retry-after', type=float, default=1, help="429 响应的 Retry-After（秒）")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    StubHandler.state = StubState(args)
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.daemon_threads = True
+    print(f"LLM 替身服务已启动: http://{args.host}:{args.port} | 首 token {args.latency}s | "
+          f"{args.token_rate} token/s | {args.tokens} token | 错误率 {args.error_rate}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()